@@ -64,5 +64,27 @@ End
         # Its end should be after its start
         self.assertGreater(editor._fold_ranges[name2_index], name2_index)
 
+    def test_fold_ranges_follow_incremental_edits(self):
+        editor = CodeEditor(styles={'DarkTheme': {}}, settings_manager=None)
+        editor.setPlainText("name: First\nStart\nEnd\n---\nname: Second\nStart\nEnd\n")
+        editor.compute_fold_ranges()
+        self.assertEqual(editor._fold_ranges, {0: 2, 4: 7})
+
+        # Insert a function block in the middle of the first section
+        cursor = editor.textCursor()
+        cursor.setPosition(editor.document().findBlockByNumber(2).position())
+        cursor.insertText("function Greet\nSay hello\nend\n")
+        editor.compute_fold_ranges()
+        self.assertEqual(editor._fold_ranges, {0: 5, 2: 4, 7: 10})
+
+        # Removing the separator merges the sections up to the next header
+        cursor = editor.textCursor()
+        block = editor.document().findBlockByNumber(6)
+        cursor.setPosition(block.position())
+        cursor.setPosition(block.position() + block.length(), cursor.KeepAnchor)
+        cursor.removeSelectedText()
+        editor.compute_fold_ranges()
+        self.assertEqual(editor._fold_ranges, {0: 5, 2: 4, 6: 9})
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,55 @@
+import unittest
+import sys
+import os
+
+# Add src to path to import PrefixTrie
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from PyQt5.QtWidgets import QApplication, QWidget
+
+from views.code_editor import CodeEditor, PrefixTrie, TaggedTrie
+
+
+class TestPrefixTrie(unittest.TestCase):
+    def test_matches_lowercase_startswith_filter(self):
+        words = ["Jump To", "jam", "Say", "JUMP", "Nagatoro", "nagatoro_smile", "Jump To"]
+        trie = PrefixTrie(words)
+        for prefix in ["", "j", "ju", "jump to", "n", "nagatoro_", "x", "say!"]:
+            expected = [w for w in words if w.lower().startswith(prefix)]
+            self.assertEqual(list(trie.starts_with(prefix)), expected, prefix)
+
+    def test_tagged_trie_keeps_sources_in_insertion_order(self):
+        trie = TaggedTrie([("Say", "snil"), ("Show", "snil"), ("Sara", "char"), ("Nagatoro", "char")])
+        self.assertEqual(list(trie.starts_with("s")), [("Say", "snil"), ("Show", "snil"), ("Sara", "char")])
+        self.assertEqual(list(trie.starts_with("sa")), [("Say", "snil"), ("Sara", "char")])
+        trie.insert("Sam", "char")
+        self.assertEqual(list(trie.starts_with("sam")), [("Sam", "char")])
+
+    def test_empty_trie(self):
+        trie = PrefixTrie()
+        self.assertEqual(list(trie.starts_with("a")), [])
+        self.assertEqual(list(trie.starts_with("")), [])
+
+
+class TestAutocompleteTrie(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        if not QApplication.instance():
+            cls.app = QApplication(sys.argv)
+        else:
+            cls.app = QApplication.instance()
+
+    def test_trie_is_reused_with_empty_character_cache(self):
+        window = QWidget()
+        window.snil_commands = ["Say", "Show"]
+        window.character_cache = []
+        editor = CodeEditor(styles={'DarkTheme': {}}, settings_manager=None)
+        editor.setup_autocomplete(window)
+        trie = editor._autocomplete_trie()
+        self.assertIs(editor._autocomplete_trie(), trie)
+        window.character_cache.append("Sara")
+        self.assertEqual(list(editor._autocomplete_trie().starts_with("sa")), [("Say", "snil"), ("Sara", "char")])
+
+
+if __name__ == '__main__':
+    unittest.main()
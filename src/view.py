@@ -476,6 +476,9 @@ class SNILEditorWindow(QMainWindow):
             margin: 4px 5px;
         }}
         """
+        # Autocomplete popups are styled once here instead of per instance
+        from views.autocomplete_popup import popup_stylesheet
+        css += popup_stylesheet(styles)
         return css
 
     def init_ui(self):
@@ -1,145 +1,353 @@
 """
 Autocomplete popup for Jump To functionality
 """
-from PyQt5.QtWidgets import QListWidget, QListWidgetItem, QWidget, QVBoxLayout, QFrame
-from PyQt5.QtCore import Qt, pyqtSignal, QRect
-from PyQt5.QtGui import QFont, QColor
+import bisect
 
+from PyQt5.QtWidgets import QListView, QAbstractItemView, QFrame
+from PyQt5.QtCore import Qt, pyqtSignal, QRect, QStringListModel
+from PyQt5.QtGui import QFont, QFontDatabase, QFontMetrics
 
-class AutocompletePopup(QListWidget):
+try:
+    # Optional: native fuzzy matching for filter_fuzzy()
+    from rapidfuzz import process, fuzz
+except ImportError:
+    process = fuzz = None
+
+
+# Formatted popup stylesheets, keyed by theme colors
+_QSS_CACHE = {}
+
+
+def popup_stylesheet(styles):
+    """Return the stylesheet rules for autocomplete popups.
+
+    The rules are scoped by the popup object name so they can be installed once
+    as part of the window stylesheet instead of being parsed per popup instance.
     """
-    A popup list widget for autocomplete suggestions.
+    theme = styles.get('DarkTheme', {}) if styles else {}
+
+    bg_color = theme.get('SecondaryBackground', '#2A2A2A')
+    border = theme.get('BorderColor', '#3A3A3A')
+    hover = theme.get('HoverColor', '#3A3A3A')
+    highlight = theme.get('HighlightColor', '#C84B31')
+
+    key = (bg_color, border, hover, highlight)
+    qss = _QSS_CACHE.get(key)
+    if qss is None:
+        qss = f"""
+        QListView#AutocompletePopup {{
+            background-color: {bg_color};
+            border: 1px solid {border};
+            border-radius: 4px;
+            padding: 2px;
+        }}
+        QListView#AutocompletePopup::item {{
+            padding: 5px;
+            border-bottom: 1px solid {border};
+        }}
+        QListView#AutocompletePopup::item:selected {{
+            background-color: {hover};
+            color: {highlight};
+        }}
+        """
+        _QSS_CACHE[key] = qss
+    return qss
+
+
+class AutocompletePopup(QListView):
+    """
+    A popup list view for autocomplete suggestions.
     Shows a list of available dialog names when typing 'Jump To'.
     """
     item_selected = pyqtSignal(str)  # Signal emitted when an item is selected
+    item_activated = pyqtSignal(object)  # Same, but carries the item payload
+
+    _FONT = None  # Shared popup font, see _font()
+
+    @classmethod
+    def get_for(cls, parent, styles=None):
+        """Return the popup owned by parent, creating it on first use.
+
+        The popup is a native top-level window, so it is created once per editor
+        and then only shown and hidden, never destroyed and recreated.
+        """
+        popup = getattr(parent, '_autocomplete_popup', None)
+        if popup is None:
+            popup = cls(parent=parent, styles=styles)
+        return popup
 
     def __init__(self, parent=None, styles=None):
         super().__init__(parent)
         self.styles = styles or {}
-        
+
+        if parent is not None:
+            assert getattr(parent, '_autocomplete_popup', None) is None, \
+                "An AutocompletePopup already exists for this parent; use AutocompletePopup.get_for()"
+            parent._autocomplete_popup = self
+
         # Configure the popup - use Qt.ToolTip to avoid blocking input
         self.setWindowFlags(Qt.ToolTip | Qt.FramelessWindowHint | Qt.WindowStaysOnTopHint)
         self.setFrameStyle(QFrame.NoFrame)
-        self.setWindowOpacity(0.95)
+        # Kept opaque: window opacity makes the compositor blend the popup and
+        # repaint the editor underneath it on every show and move
 
         # Set focus policy to avoid blocking input
         self.setFocusPolicy(Qt.NoFocus)
 
-        # Set up appearance based on styles
-        self._setup_appearance()
+        # Suggestions are plain strings, so a string list model is enough
+        # and avoids allocating a QListWidgetItem per row
+        self._model = QStringListModel(self)
+        self.setModel(self._model)
+        self.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self._last_items = ()
+        self._payloads = []  # Row-aligned payloads passed to update_items
+        self._content_width = 0  # Widest item text plus padding, see update_items
+        self._sorted = []
+        self._keys = []
+
+        # Appearance is set up on first use, see _ensure_appearance()
+        self._appearance_done = False
+
+        # All rows share one height, so Qt can skip per-row size hint queries
+        self.setUniformItemSizes(True)
+        self.setLayoutMode(QListView.Batched)
+        self.setBatchSize(64)
+        self.setItemAlignment(Qt.AlignLeft)
+        self.setVerticalScrollMode(QAbstractItemView.ScrollPerPixel)
+
+        # Long names are elided instead of scrolled, so Qt never measures the widest row
+        self.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
+        self.setVerticalScrollBarPolicy(Qt.ScrollBarAsNeeded)
+        self.setTextElideMode(Qt.ElideRight)
+        self.setWordWrap(False)
+
+        # No hover styling: skip hover tracking and the row repaint on every mouse move
+        self.setAttribute(Qt.WA_Hover, False)
+        self.viewport().setAttribute(Qt.WA_Hover, False)
+        self.viewport().setMouseTracking(False)
+
+        # Navigation keys forwarded from the editor
+        self._key_handlers = {
+            Qt.Key_Up: lambda: self._move(-1),
+            Qt.Key_Down: lambda: self._move(+1),
+            Qt.Key_Return: self._accept,
+            Qt.Key_Enter: self._accept,
+            Qt.Key_Escape: self.hide,
+        }
 
         # Connect item selection
-        self.itemClicked.connect(self._on_item_clicked)
+        self.clicked.connect(self._on_item_clicked)
 
         # Set initial visibility to hidden
         self.hide()
 
+        # Available screen area, cached between shows (see show_popup)
+        self._avail_rect = None
+        self._screen_tracked = False
+
+    def _ensure_appearance(self):
+        """Set up the appearance the first time the popup is populated or shown."""
+        if not self._appearance_done:
+            self._setup_appearance()
+            self._appearance_done = True
+
     def _setup_appearance(self):
         """Set up the appearance based on styles."""
-        theme = self.styles.get('DarkTheme', {}) if self.styles else {}
-        
-        # Set background color
-        bg_color = theme.get('SecondaryBackground', '#2A2A2A')
-        self.setStyleSheet(f"""
-            QListWidget {{
-                background-color: {bg_color};
-                border: 1px solid {theme.get('BorderColor', '#3A3A3A')};
-                border-radius: 4px;
-                padding: 2px;
-            }}
-            QListWidget::item {{
-                padding: 5px;
-                border-bottom: 1px solid {theme.get('BorderColor', '#3A3A3A')};
-            }}
-            QListWidget::item:selected {{
-                background-color: {theme.get('HoverColor', '#3A3A3A')};
-                color: {theme.get('HighlightColor', '#C84B31')};
-            }}
-            QListWidget::item:hover {{
-                background-color: {theme.get('HoverColor', '#3A3A3A')};
-            }}
-        """)
-        
+        # Colors come from the window-wide stylesheet (see popup_stylesheet), matched by object name
+        self.setObjectName("AutocompletePopup")
+
         # Set font
-        font = QFont()
-        font.setFamily("Consolas, 'Courier New', monospace")
-        font.setPointSize(10)
-        self.setFont(font)
+        self.setFont(self._font())
+
+    @classmethod
+    def _font(cls):
+        """Return the monospace popup font, resolved once and shared by all popups."""
+        if cls._FONT is None:
+            font = QFont()
+            families = set(QFontDatabase().families())
+            for family in ("Consolas", "Courier New"):
+                if family in families:
+                    font.setFamily(family)
+                    break
+            else:
+                font.setStyleHint(QFont.Monospace)
+                font.setFamily("monospace")
+            font.setPointSize(10)
+            cls._FONT = font
+        return cls._FONT
+
+    def count(self):
+        """Return the number of items in the popup."""
+        return self._model.rowCount()
+
+    def items(self):
+        """Return the items currently shown in the popup."""
+        return self._model.stringList()
+
+    def currentRow(self):
+        """Return the row of the current item, or -1 if there is none."""
+        return self.currentIndex().row()
+
+    def setCurrentRow(self, row):
+        """Make the item at the given row current."""
+        self.setCurrentIndex(self._model.index(row, 0))
 
     def update_items(self, items):
-        """Update the list of items in the popup."""
-        self.clear()
-        for item_text in items:
-            item = QListWidgetItem(item_text)
-            item.setFlags(item.flags() | Qt.ItemIsEnabled | Qt.ItemIsSelectable)
-            self.addItem(item)
-        
+        """Update the list of items in the popup.
+
+        Items are either plain strings or (text, payload) pairs; the payload is
+        delivered through item_activated when the item is chosen.
+        """
+        self._ensure_appearance()
+        entries = [(item, item) if isinstance(item, str) else tuple(item) for item in items]
+        items = tuple(text for text, _ in entries)
+        self._payloads = [payload for _, payload in entries]
+        # Unchanged suggestions (the common case while typing) leave the model untouched
+        if items != self._last_items:
+            old_count = len(self._last_items)
+            removed_rows = self._rows_to_remove(self._last_items, items)
+            if removed_rows is not None:
+                # The filter only narrowed the list: drop the missing rows, keep the rest
+                for first, last in reversed(removed_rows):
+                    self._model.removeRows(first, last - first + 1)
+            elif old_count and items[:old_count] == self._last_items:
+                # Items were appended to the current list: keep the existing rows, add the tail
+                self._model.insertRows(old_count, len(items) - old_count)
+                for row in range(old_count, len(items)):
+                    self._model.setData(self._model.index(row, 0), items[row])
+            else:
+                # A single model reset instead of one insertion per row
+                self._model.setStringList(list(items))
+            self._last_items = items
+
+            # Measure the widest item here rather than on every show
+            fm = QFontMetrics(self.font())
+            self._content_width = max((fm.horizontalAdvance(text) for text in items), default=0) + 24  # item padding
+
         # Select the first item if available
         if self.count() > 0:
             self.setCurrentRow(0)
 
+    def set_source(self, names):
+        """Set the full list of suggestions used by filter()."""
+        self._sorted = sorted(names, key=str.lower)
+        self._keys = [name.lower() for name in self._sorted]
+
+    def filter(self, prefix):
+        """Show the source suggestions starting with prefix (case-insensitive)."""
+        # The keys are sorted, so the matches form one contiguous range found by bisection
+        p = prefix.lower()
+        lo = bisect.bisect_left(self._keys, p)
+        hi = bisect.bisect_right(self._keys, p + '\uffff', lo)
+        self.update_items(self._sorted[lo:hi])
+
+    def filter_fuzzy(self, query, source, limit=100):
+        """Show the suggestions from source that fuzzily match query, best first.
+
+        Falls back to the prefix filter when rapidfuzz is not installed.
+        """
+        if process is None:
+            self.set_source(source)
+            self.filter(query)
+            return
+        ranked = process.extract(query, source, scorer=fuzz.WRatio, limit=limit)
+        self.update_items([name for name, score, _ in ranked if score > 40])
+
+    @staticmethod
+    def _rows_to_remove(old_items, new_items):
+        """Return (first, last) row ranges that turn old_items into new_items.
+
+        Returns None when new_items is not an ordered subset of old_items.
+        """
+        if len(new_items) > len(old_items):
+            return None
+        ranges = []
+        j = 0
+        for row, text in enumerate(old_items):
+            if j < len(new_items) and text == new_items[j]:
+                j += 1
+            elif ranges and ranges[-1][1] == row - 1:
+                ranges[-1] = (ranges[-1][0], row)
+            else:
+                ranges.append((row, row))
+        return ranges if j == len(new_items) else None
+
     def show_popup(self, position):
         """Show the popup at the specified position."""
         if self.count() > 0:
-            # Calculate the height based on the number of items
-            # Each item typically has a height of about 25-30 pixels
+            self._ensure_appearance()
+
+            # Calculate the final geometry once instead of resizing in several steps
             item_height = 30  # Approximate height per item
             max_visible_items = 10  # Maximum number of items to show without scrolling
-            num_items = min(self.count(), max_visible_items)
-            calculated_height = num_items * item_height + 10  # Add some padding
-
-            # Set the maximum height to show scrollbars if needed
-            self.setMaximumHeight(calculated_height)
-
-            # Adjust size to fit content
-            self.adjustSize()
+            height = min(self.count(), max_visible_items) * item_height + 10  # Add some padding
+            width = self._content_width + 2 * self.frameWidth() + 16
 
             # Position the popup below the cursor position
-            popup_rect = QRect(position, self.sizeHint())
-            screen_rect = self.screen().availableGeometry()
+            popup_rect = QRect(position.x(), position.y(), width, height)
+            if self._avail_rect is None:
+                self._avail_rect = self.screen().availableGeometry()
+            screen_rect = self._avail_rect
 
             # Adjust position to stay within screen bounds
             if popup_rect.bottom() > screen_rect.bottom():
-                popup_rect.moveTop(position.y() - popup_rect.height())
+                popup_rect.moveTop(position.y() - height)
             if popup_rect.right() > screen_rect.right():
-                popup_rect.moveLeft(screen_rect.right() - popup_rect.width())
+                popup_rect.moveLeft(screen_rect.right() - width)
 
             self.setGeometry(popup_rect)
             self.show()
+            if not self._screen_tracked and self.windowHandle() is not None:
+                # The native window only exists after the first show
+                self.windowHandle().screenChanged.connect(self._on_screen_changed)
+                self._screen_tracked = True
             # Don't call setFocus() to avoid blocking input in the editor
 
+    def _on_screen_changed(self, screen):
+        """Drop the cached screen geometry when the popup moves to another screen."""
+        self._avail_rect = None
+
     def hide_popup(self):
-        """Hide the popup."""
+        """Hide the popup (it is kept alive for reuse)."""
         self.hide()
 
-    def _on_item_clicked(self, item):
+    def _on_item_clicked(self, index):
         """Handle item click event."""
-        self.item_selected.emit(item.text())
+        self._emit_selection(index)
+
+    def _emit_selection(self, index):
+        """Emit the payload and text of the item at index and hide the popup."""
+        self.item_activated.emit(self._payloads[index.row()])
+        self.item_selected.emit(index.data())
         self.hide()
 
+    def _move(self, delta):
+        """Move the selection by delta rows, wrapping around at either end."""
+        n = self.count()
+        if n:
+            self.setCurrentRow((self.currentRow() + delta) % n)
+
+    def _accept(self):
+        """Emit the current item as the selection and hide the popup."""
+        current_index = self.currentIndex()
+        if current_index.isValid():
+            self._emit_selection(current_index)
+
+    def handle_key(self, key):
+        """Run the navigation handler for key; return False if the popup does not handle it.
+
+        The popup never takes focus, so the editor forwards navigation keys here.
+        """
+        handler = self._key_handlers.get(key)
+        if handler is None:
+            return False
+        handler()
+        return True
+
     def keyPressEvent(self, event):
         """Handle keyboard events for navigation."""
-        if event.key() == Qt.Key_Up:
-            current_row = self.currentRow()
-            if current_row > 0:
-                self.setCurrentRow(current_row - 1)
-            else:
-                self.setCurrentRow(self.count() - 1)
-        elif event.key() == Qt.Key_Down:
-            current_row = self.currentRow()
-            if current_row < self.count() - 1:
-                self.setCurrentRow(current_row + 1)
-            else:
-                self.setCurrentRow(0)
-        elif event.key() in [Qt.Key_Return, Qt.Key_Enter]:
-            current_item = self.currentItem()
-            if current_item:
-                self.item_selected.emit(current_item.text())
-                self.hide()
-        elif event.key() == Qt.Key_Escape:
-            self.hide()
-        else:
+        if not self.handle_key(event.key()):
             # For other keys, pass to parent
             super().keyPressEvent(event)
             return
-        event.accept()
\ No newline at end of file
+        event.accept()
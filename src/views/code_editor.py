@@ -2,13 +2,235 @@
 Custom QPlainTextEdit with line numbers and particle effects
 Based on PyQt5 example for creating a text editor with line numbers
 """
-from PyQt5.QtWidgets import QWidget, QPlainTextEdit, QFrame, QLabel, QScrollBar
-from PyQt5.QtCore import Qt, QRect, pyqtProperty, QTimer
+from PyQt5.QtWidgets import QApplication, QWidget, QPlainTextEdit, QFrame, QLabel, QScrollBar
+from PyQt5.QtCore import Qt, QRect, QPoint, QPointF, pyqtProperty, QTimer
 import re
-from PyQt5.QtGui import QPainter, QColor, QTextFormat, QFontMetrics, QTextCursor
-from PyQt5.QtCore import QPropertyAnimation, QEasingCurve
+import time
+from functools import lru_cache
+from PyQt5.QtGui import QPainter, QColor, QTextFormat, QFontMetrics, QFontMetricsF, QTextCursor, QStaticText, QTransform
+from PyQt5.QtCore import QPropertyAnimation, QVariantAnimation, QEasingCurve
 from .particle_system import ParticleEffect
 
+try:
+    import numpy as np
+    from numba import njit
+except ImportError:
+    np = None
+    njit = None
+
+
+# Line patterns used by compute_fold_ranges
+_RE_FUNC = re.compile(r'^\s*(function|call)\b', re.IGNORECASE)
+_RE_END = re.compile(r'^\s*end\b', re.IGNORECASE)
+_RE_IFSHOW = re.compile(r'^\s*If\s+Show\s+Variant\b', re.IGNORECASE)
+_RE_ENDIF = re.compile(r'^\s*endif\b', re.IGNORECASE)
+_RE_NAME = re.compile(r'^(\s*)name\s*:\s*.*', re.IGNORECASE)
+_RE_SEP = re.compile(r'^\s*---\s*$')
+
+# Characters that end the word being completed, see _show_autocomplete and _insert_autocomplete_item
+_WORD_SEPARATORS = (' ', ':', '\t', '\n', '\r')
+
+# Most command and character name suggestions listed at once, see _show_autocomplete
+AUTOCOMPLETE_LIMIT = 50
+
+# Stands in for a missing or empty word list; one shared object, so the autocomplete trie
+# cache still recognizes it on the next call
+_NO_WORDS = ()
+
+# Line classes used by the fold range matcher
+LINE_OTHER, LINE_FUNC, LINE_END, LINE_IFSHOW, LINE_ENDIF, LINE_NAME, LINE_SEP = range(7)
+
+
+# Patterns worth trying for a line, keyed by its first non-space character. Lines
+# starting with anything else cannot match, so most lines never reach a regex.
+# The dotless/dotted I variants match 'i' under re.IGNORECASE.
+_CLASSIFY_BY_INITIAL = {
+    'f': ((_RE_FUNC, LINE_FUNC),),
+    'c': ((_RE_FUNC, LINE_FUNC),),
+    'e': ((_RE_END, LINE_END), (_RE_ENDIF, LINE_ENDIF)),
+    'i': ((_RE_IFSHOW, LINE_IFSHOW),),
+    '\u0130': ((_RE_IFSHOW, LINE_IFSHOW),),
+    '\u0131': ((_RE_IFSHOW, LINE_IFSHOW),),
+    'n': ((_RE_NAME, LINE_NAME),),
+    '-': ((_RE_SEP, LINE_SEP),),
+}
+for _ch in 'FCEIN':
+    _CLASSIFY_BY_INITIAL[_ch] = _CLASSIFY_BY_INITIAL[_ch.lower()]
+del _ch
+
+
+def _classify_line(text):
+    """Return the LINE_* class of a single line of text"""
+    stripped = text.lstrip()
+    if not stripped:
+        return LINE_OTHER
+    candidates = _CLASSIFY_BY_INITIAL.get(stripped[0])
+    if candidates is None:
+        return LINE_OTHER
+    for pattern, tag in candidates:
+        if pattern.match(text):
+            return tag
+    return LINE_OTHER
+
+
+def _match_fold_ranges(tags):
+    """Build {start_line: end_line} fold ranges from a list of line classes.
+
+    function/call..end and If Show Variant..endif are matched with stacks;
+    a 'name:' header folds until the next '---' separator, next 'name:' or EOF.
+    Large documents go through the compiled _fold_kernel when Numba is installed.
+    """
+    if njit is not None and len(tags) >= _FOLD_KERNEL_MIN_LINES:
+        starts, ends = _fold_kernel(np.array(tags, dtype=np.int8))
+        return dict(zip(starts.tolist(), ends.tolist()))
+    fold_ranges = {}
+    func_stack = []
+    if_stack = []
+    name_start = -1
+    for line_no, tag in enumerate(tags):
+        if tag == LINE_OTHER:
+            continue
+        if tag == LINE_FUNC:
+            func_stack.append(line_no)
+        elif tag == LINE_END:
+            if func_stack:
+                fold_ranges[func_stack.pop()] = line_no
+        elif tag == LINE_IFSHOW:
+            if_stack.append(line_no)
+        elif tag == LINE_ENDIF:
+            if if_stack:
+                fold_ranges[if_stack.pop()] = line_no
+        else:
+            # A separator or another header ends the current 'name:' section
+            if line_no - 1 > name_start >= 0:
+                fold_ranges[name_start] = line_no - 1
+            name_start = line_no if tag == LINE_NAME else -1
+    if len(tags) - 1 > name_start >= 0:
+        fold_ranges[name_start] = len(tags) - 1
+    return fold_ranges
+
+
+def _fold_kernel(tags):
+    """Stack matcher of _match_fold_ranges over an int8 array, compiled with Numba.
+
+    Returns (starts, ends) int32 arrays of the matched ranges.
+    """
+    n = tags.shape[0]
+    starts = np.empty(n, np.int32)
+    ends = np.empty(n, np.int32)
+    func_stack = np.empty(n, np.int32)
+    if_stack = np.empty(n, np.int32)
+    count = 0
+    func_top = 0
+    if_top = 0
+    name_start = -1
+    for line_no in range(n):
+        tag = tags[line_no]
+        if tag == LINE_OTHER:
+            continue
+        if tag == LINE_FUNC:
+            func_stack[func_top] = line_no
+            func_top += 1
+        elif tag == LINE_END:
+            if func_top > 0:
+                func_top -= 1
+                starts[count] = func_stack[func_top]
+                ends[count] = line_no
+                count += 1
+        elif tag == LINE_IFSHOW:
+            if_stack[if_top] = line_no
+            if_top += 1
+        elif tag == LINE_ENDIF:
+            if if_top > 0:
+                if_top -= 1
+                starts[count] = if_stack[if_top]
+                ends[count] = line_no
+                count += 1
+        else:
+            if name_start >= 0 and line_no - 1 > name_start:
+                starts[count] = name_start
+                ends[count] = line_no - 1
+                count += 1
+            name_start = line_no if tag == LINE_NAME else -1
+    if name_start >= 0 and n - 1 > name_start:
+        starts[count] = name_start
+        ends[count] = n - 1
+        count += 1
+    return starts[:count], ends[:count]
+
+
+if njit is not None:
+    _fold_kernel = njit(cache=True)(_fold_kernel)
+
+# Below this many lines the array conversion costs more than the compiled loop saves
+_FOLD_KERNEL_MIN_LINES = 2000
+
+
+class PrefixTrie:
+    """Case-insensitive prefix index over a list of words.
+
+    Every node keeps the words of its subtree in insertion order, so a lookup
+    walks one node per prefix character instead of scanning all the words.
+    """
+
+    def __init__(self, words=()):
+        self._root = {None: []}  # None holds the node's words, other keys are characters
+        # Node reached by the previous lookup; typing usually extends that prefix
+        self._last_prefix = ''
+        self._last_node = self._root
+        # Fast typing repeats the same prefixes; the cache is cleared by insert
+        self.starts_with = lru_cache(maxsize=64)(self._starts_with)
+        for word in words:
+            self.insert(word)
+
+    def insert(self, word):
+        self._add(word, word)
+
+    def _add(self, word, entry):
+        """Store entry on every node along the lowercase path of word"""
+        self.starts_with.cache_clear()
+        self._last_prefix, self._last_node = '', self._root
+        node = self._root
+        node[None].append(entry)
+        for ch in word.lower():
+            child = node.get(ch)
+            if child is None:
+                child = node[ch] = {None: []}
+            node = child
+            node[None].append(entry)
+
+    def _starts_with(self, prefix):
+        """Words starting with the lowercase prefix, in insertion order (do not modify)"""
+        if prefix.startswith(self._last_prefix):
+            # Continue from the previous node: only the newly typed characters are walked,
+            # and a prefix that matched nothing cannot match once it is extended
+            node = self._last_node
+            rest = prefix[len(self._last_prefix):]
+        else:
+            node = self._root
+            rest = prefix
+        for ch in rest:
+            if node is None:
+                break
+            node = node.get(ch)
+        self._last_prefix, self._last_node = prefix, node
+        return [] if node is None else node[None]
+
+
+class TaggedTrie(PrefixTrie):
+    """PrefixTrie over words from several sources; lookups return (word, tag) pairs.
+
+    One walk finds the matches of every source, already in insertion order.
+    """
+
+    def __init__(self, tagged_words=()):
+        super().__init__()
+        for word, tag in tagged_words:
+            self.insert(word, tag)
+
+    def insert(self, word, tag=None):
+        self._add(word, (word, tag))
+
 
 class LineNumberArea(QFrame):
     """Widget to display line numbers"""
@@ -20,6 +242,8 @@ class LineNumberArea(QFrame):
         # Устанавливаем стиль фона из темы
         secondary_bg = editor.styles.get('DarkTheme', {}).get('SecondaryBackground', '#2A2A2A')
         self.setStyleSheet(f"background-color: {secondary_bg};")
+        # paintEvent fills the whole exposed rect, so Qt can skip erasing the background first
+        self.setAttribute(Qt.WA_OpaquePaintEvent, True)
 
     def sizeHint(self):
         from PyQt5.QtCore import QSize
@@ -29,17 +253,9 @@ class LineNumberArea(QFrame):
         self.code_editor.line_number_paint_event(event)
 
     def mousePressEvent(self, event):
-        # Determine which block was clicked and forward to editor to toggle folding
-        y = event.y()
-        block = self.code_editor.firstVisibleBlock()
-        top = self.code_editor.blockBoundingGeometry(block).translated(self.code_editor.contentOffset()).top()
-        while block.isValid():
-            bottom = top + self.code_editor.blockBoundingRect(block).height()
-            if y >= top and y <= bottom:
-                self.code_editor.toggle_fold_at_line(block.blockNumber())
-                return
-            block = block.next()
-            top = bottom
+        # Let the editor layout find the clicked block and forward it to toggle folding
+        cursor = self.code_editor.cursorForPosition(QPoint(0, event.y()))
+        self.code_editor.toggle_fold_at_line(cursor.blockNumber())
 
 
 class CodeEditor(QPlainTextEdit):
@@ -53,6 +269,9 @@ class CodeEditor(QPlainTextEdit):
 
         # Create line number area
         self.line_numbers = LineNumberArea(self)
+        self._cached_digits = -1  # Digit count the cached gutter width was computed for
+        self._cached_gutter_width = 0
+        self._rebuild_gutter_glyphs()
 
         # Create particle effect system
         try:
@@ -84,19 +303,27 @@ class CodeEditor(QPlainTextEdit):
 
         # Get highlight color from styles for current line number
         self.current_line_color = self.styles.get('DarkTheme', {}).get('ActiveLineNumberColor', '#C84B31')  # Default to highlight color
+        self._style_cache = None  # Gutter colors, see _gutter_colors()
 
         # Animation for current line highlighting
         self._current_line_opacity = 0.0  # Initial opacity for animation
+        self._last_highlight_block = -1  # Block the highlight animation was last started for
         self.current_line_animation = QPropertyAnimation(self, b"current_line_opacity")
         self.current_line_animation.setDuration(150)  # Animation duration in ms
         self.current_line_animation.setEasingCurve(QEasingCurve.InOutQuad)
 
-        # Timer for pulsing animation when highlighting is enabled
-        from PyQt5.QtCore import QTimer
-        self.pulse_timer = QTimer()
-        self.pulse_timer.timeout.connect(self._update_pulse)
+        # Pulsing animation when highlighting is enabled: opacity 1.0 -> 0.3 -> 1.0, looped
         self._pulse_value = 0.0  # Current pulse value (0.0 to 1.0)
-        self._pulse_direction = 0.02  # Pulse increment/decrement value
+        self._current_line_rect = None  # Gutter rect repainted by the pulse, see _current_line_gutter_rect
+        self._pulse_anim = QVariantAnimation(self)
+        self._pulse_anim.setStartValue(1.0)
+        self._pulse_anim.setKeyValueAt(0.5, 0.3)  # Minimum opacity for pulsing
+        self._pulse_anim.setEndValue(1.0)
+        self._pulse_anim.setDuration(2100)
+        self._pulse_anim.setEasingCurve(QEasingCurve.InOutSine)
+        self._pulse_anim.setLoopCount(-1)
+        self._pulse_anim.valueChanged.connect(self._on_pulse_value)
+        QApplication.instance().applicationStateChanged.connect(self._on_application_state_changed)
 
         # Autocomplete functionality for Jump To and Characters
         self.autocomplete_popup = None
@@ -104,15 +331,26 @@ class CodeEditor(QPlainTextEdit):
         self.autocomplete_timer.setSingleShot(True)
         self.autocomplete_timer.timeout.connect(self._show_autocomplete)
         self.jump_to_prefix = "Jump To "
+        self._jump_to_prefix_lc = self.jump_to_prefix.lower()
+        self._jump_to_source = None  # (dialog_cache list, its length) last indexed by the popup
+        self._ac_trie = None  # (SNIL commands, character names, their lengths, TaggedTrie)
+        self._last_ac_key = None  # What the popup currently lists suggestions for, see _show_autocomplete
         self.character_prefix = ""  # Empty prefix - will trigger on any character input
         self.is_autocomplete_active = False
         self.parent_window = None  # Will be set by the main window
         self.last_char_pressed = None
         self.last_cursor_pos = -1
 
+        # Particle throttling state, see on_text_changed
+        self._suppress_particles = False
+        self._last_doc_length = self.document().characterCount()
+        self._last_particle_ts = 0.0
+
         # Connect signals - correct PyQt5 signals (after initialization)
         self.blockCountChanged.connect(self.update_line_number_area_width)
         self.updateRequest.connect(self.update_line_number_area)
+        self.updateRequest.connect(self._invalidate_current_line_rect)
+        self.cursorPositionChanged.connect(self._invalidate_current_line_rect)
         self.cursorPositionChanged.connect(self.highlight_current_line)  # Highlight current line when cursor moves
         self.verticalScrollBar().valueChanged.connect(self.update_line_numbers_scroll)
 
@@ -122,31 +360,34 @@ class CodeEditor(QPlainTextEdit):
         # Folding support: compute fold ranges for functions and 'name:' branches and track folded state
         self._fold_ranges = {}  # start_block_number -> end_block_number
         self._folded = set()    # set of start_block_numbers that are currently folded
-        # Recompute fold ranges when text changes or blocks change
-        self.textChanged.connect(self.compute_fold_ranges)
-        self.blockCountChanged.connect(self.compute_fold_ranges)
+        # Recompute fold ranges when text changes or blocks change; a burst of edits
+        # is coalesced into a single rescan once typing pauses
+        self._fold_recompute_timer = QTimer(self)
+        self._fold_recompute_timer.setSingleShot(True)
+        self._fold_recompute_timer.setInterval(150)
+        self._fold_recompute_timer.timeout.connect(self.compute_fold_ranges)
+        # Per-line LINE_* classes, updated incrementally from document changes
+        self._line_tags = None
+        self.document().contentsChange.connect(self._on_contents_change)
+        self.textChanged.connect(self.schedule_fold_ranges)
+        self.blockCountChanged.connect(self.schedule_fold_ranges)
 
         # Expose a click handler on the gutter (handled by LineNumberArea.mousePressEvent)
         # LineNumberArea will call editor.toggle_fold_at_line(block_number) when clicked
 
-    def resizeEvent(self, event):
-        """Handle resize events to ensure particle effect is properly sized"""
-        # Call the original resize event
-        super().resizeEvent(event)
-
-        # Update particle effect geometry to match new editor size
-        if hasattr(self, 'particle_effect'):
-            self.particle_effect.update_parent_geometry()
-
     def line_number_area_width(self):
         """Calculate the width needed for line numbers"""
         digits = len(str(max(1, self.blockCount())))
-        # Увеличиваем базовый отступ для большего расстояния между номерами строк и текстом
-        space = 25 + self.fontMetrics().width('9') * digits
-        return space
+        # The width only changes with the number of digits or the font (see _rebuild_gutter_glyphs)
+        if digits != self._cached_digits:
+            self._cached_digits = digits
+            # Увеличиваем базовый отступ для большего расстояния между номерами строк и текстом
+            self._cached_gutter_width = 25 + self._digit_w * digits
+        return self._cached_gutter_width
 
     def update_line_number_area_width(self, new_block_count):
         """Update the width of the line number area"""
+        self._current_line_rect = None
         self.setViewportMargins(self.line_number_area_width(), 0, 0, 0)
 
     def update_line_number_area(self, rect, dy):
@@ -162,12 +403,18 @@ class CodeEditor(QPlainTextEdit):
 
     def highlight_current_line(self):
         """Highlight the current line in the line number area with animation"""
+        # Only a move to another line changes the highlight; ignore moves within the line
+        block_number = self.textCursor().blockNumber()
+        if block_number == self._last_highlight_block:
+            return
+        self._last_highlight_block = block_number
+
         # Check if line highlighting is enabled in settings
         if (self.settings_manager and
             hasattr(self.settings_manager, 'highlight_current_line') and
             not self.settings_manager.highlight_current_line):
-            # If highlighting is disabled, stop the pulse timer and clear the highlight
-            self.pulse_timer.stop()
+            # If highlighting is disabled, stop the pulse and clear the highlight
+            self._pulse_anim.stop()
             self.current_line_animation.stop()
             self.current_line_animation.setStartValue(self._current_line_opacity)
             self.current_line_animation.setEndValue(0.0)
@@ -176,114 +423,181 @@ class CodeEditor(QPlainTextEdit):
 
         # If highlighting is enabled, start the pulsing animation
         self.current_line_animation.stop()
+        self._restart_pulse()
+
+    def _highlight_enabled(self):
+        """Whether current line highlighting is enabled in settings"""
+        return not (self.settings_manager and
+                    hasattr(self.settings_manager, 'highlight_current_line') and
+                    not self.settings_manager.highlight_current_line)
+
+    def _resume_pulse(self):
+        """Run the pulse animation, but only while the editor is shown and focused"""
+        if (self._highlight_enabled() and self.isVisible() and self.hasFocus()
+                and self._pulse_anim.state() != QVariantAnimation.Running):
+            self._pulse_anim.start()
+
+    def _restart_pulse(self):
+        """Restart the pulse from full opacity, e.g. after moving to another line"""
+        self._pulse_anim.stop()
         self._pulse_value = 1.0  # Start with full opacity
-        self._pulse_direction = -0.02  # Start decreasing
-        if not self.pulse_timer.isActive():
-            self.pulse_timer.start(30)  # Update every 30ms for smooth pulsing
+        self._resume_pulse()
+
+    def _on_application_state_changed(self, state):
+        """Pause the pulse while the application is in the background"""
+        if state == Qt.ApplicationActive:
+            self._resume_pulse()
+        else:
+            self._pulse_anim.stop()
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self._resume_pulse()
+
+    def hideEvent(self, event):
+        super().hideEvent(event)
+        self._pulse_anim.stop()
+
+    def focusInEvent(self, event):
+        super().focusInEvent(event)
+        self._resume_pulse()
+
+    def focusOutEvent(self, event):
+        super().focusOutEvent(event)
+        self._pulse_anim.stop()
 
     def resizeEvent(self, event):
         """Handle resize events to update line number area"""
         super().resizeEvent(event)
 
+        self._current_line_rect = None
         cr = self.contentsRect()
         self.line_numbers.setGeometry(QRect(cr.left(), cr.top(),
                                           self.line_number_area_width(), cr.height()))
 
+        # Keep the particle overlay covering the whole editor; this is the only place its geometry changes
+        if getattr(self, 'particle_effect', None):
+            self.particle_effect.update_parent_geometry()
+
+    def _gutter_font(self):
+        """Font used for line numbers: the editor font, one point smaller"""
+        font = self.font()
+        font.setPointSize(font.pointSize() - 1)
+        return font
+
+    def _rebuild_gutter_glyphs(self):
+        """Pre-measure and pre-layout the digits 0-9 used to draw line numbers"""
+        font = self._gutter_font()
+        fm = QFontMetricsF(font)
+        self._fm_height = self.fontMetrics().height()
+        self._digit_w = self.fontMetrics().horizontalAdvance('9')
+        self._cached_digits = -1  # Gutter width depends on the digit width
+        self._current_line_rect = None  # Its height is the line height
+        self._digit_adv = [fm.horizontalAdvance(str(d)) for d in range(10)]
+        # Digits are vertically centered in an editor line, like AlignVCenter did
+        self._digit_y_offset = (self._fm_height - fm.height()) / 2
+        self._digit_static = []
+        for d in range(10):
+            static_text = QStaticText(str(d))
+            static_text.setPerformanceHint(QStaticText.AggressiveCaching)
+            static_text.prepare(QTransform(), font)
+            self._digit_static.append(static_text)
+
+    def _draw_line_number(self, painter, number, top, right):
+        """Draw number right-aligned at right using the cached digit glyphs"""
+        x = right
+        y = top + self._digit_y_offset
+        # Peel digits off from the right with divmod instead of formatting a string per line
+        while True:
+            number, d = divmod(number, 10)
+            x -= self._digit_adv[d]
+            painter.drawStaticText(QPointF(x, y), self._digit_static[d])
+            if not number:
+                break
+
+    def _gutter_colors(self):
+        """Return the gutter colors derived from the theme, built once per style change"""
+        if self._style_cache is None:
+            theme = self.styles.get('DarkTheme', {})
+            alt_bg_color = QColor(theme.get('Background', '#1A1A1A'))
+            alt_bg_color.setAlpha(100)  # Make it semi-transparent
+            self._style_cache = {
+                'background': QColor(theme.get('SecondaryBackground', '#2A2A2A')),
+                'alt_background': alt_bg_color,
+                'default_text': QColor(theme.get('StatusDefault', '#999999')),
+                'current_line': QColor(self.current_line_color),
+            }
+        return self._style_cache
+
     def line_number_paint_event(self, event):
         """Paint the line numbers"""
         painter = QPainter(self.line_numbers)
 
+        # Everything that is constant for this paint pass is looked up once, outside the block loop
+        colors = self._gutter_colors()
+        default_text_color = colors['default_text']
+        alt_bg_color = colors['alt_background']
+        current_line_color = colors['current_line']
+        highlight_enabled = bool(getattr(self.settings_manager, 'highlight_current_line', True)) \
+            if self.settings_manager else True
+        fm_height = int(self._fm_height)
+        gutter_width = int(self.line_numbers.width())
+        rect_top = event.rect().top()
+        rect_bottom = event.rect().bottom()
+
         # Fill the background
-        background_color = self.styles.get('DarkTheme', {}).get('SecondaryBackground', '#2A2A2A')
-        painter.fillRect(event.rect(), QColor(background_color))
+        painter.fillRect(event.rect(), colors['background'])
 
         # Get the current line number (cursor position)
         current_line = self.textCursor().blockNumber() + 1
 
+        # The digit glyphs are prepared for the gutter font, so set it once for the whole pass
+        painter.setFont(self._gutter_font())
+
         block = self.firstVisibleBlock()
         block_number = block.blockNumber()
         top = self.blockBoundingGeometry(block).translated(self.contentOffset()).top()
-        bottom = top + self.blockBoundingRect(block).height()
 
-        while block.isValid() and top <= event.rect().bottom():
-            if block.isVisible() and bottom >= event.rect().top():
-                number = str(block_number + 1)
+        while block.isValid() and top <= rect_bottom:
+            if not block.isVisible():
+                # Folded blocks take no space; skip them without querying their geometry
+                block = block.next()
+                block_number += 1
+                continue
+            bottom = top + self.blockBoundingRect(block).height()
+            if bottom >= rect_top:
+                number = block_number + 1
 
                 # Check if this is the current line (where cursor is located)
-                is_current_line = (block_number + 1 == current_line)
-
-                # Check if line highlighting is enabled in settings
-                highlight_enabled = True
-                if (self.settings_manager and
-                    hasattr(self.settings_manager, 'highlight_current_line')):
-                    highlight_enabled = self.settings_manager.highlight_current_line
+                is_current_line = (number == current_line)
 
                 # Draw background for the current line if it's the active line AND highlighting is enabled
                 if is_current_line and highlight_enabled:
                     # Highlight the current line with the highlight color and animated opacity
-                    highlight_color = QColor(self.current_line_color)
+                    highlight_color = QColor(current_line_color)
                     # Use the animated opacity (convert from 0.0-1.0 to 0-255 alpha)
-                    alpha = int(self.current_line_opacity * 100)  # Use the animated opacity value
-                    highlight_color.setAlpha(alpha)
-                    painter.fillRect(0, int(top), int(self.line_numbers.width()),
-                                   int(self.fontMetrics().height()), highlight_color)
-                elif is_current_line and not highlight_enabled:
-                    # If current line highlighting is disabled, draw the same as other lines
-                    # Calculate alternating background color based on line number for current line when highlighting is disabled
-                    if (block_number + 1) % 2 == 0:
-                        # Even line numbers get a slightly different background
-                        alt_bg_color = QColor(self.styles.get('DarkTheme', {}).get('Background', '#1A1A1A'))
-                        alt_bg_color.setAlpha(100)  # Make it semi-transparent
-                        painter.fillRect(0, int(top), int(self.line_numbers.width()),
-                                       int(self.fontMetrics().height()), alt_bg_color)
-                else:
-                    # Calculate alternating background color based on line number for non-current lines
-                    if (block_number + 1) % 2 == 0:
-                        # Even line numbers get a slightly different background
-                        alt_bg_color = QColor(self.styles.get('DarkTheme', {}).get('Background', '#1A1A1A'))
-                        alt_bg_color.setAlpha(100)  # Make it semi-transparent
-                        painter.fillRect(0, int(top), int(self.line_numbers.width()),
-                                       int(self.fontMetrics().height()), alt_bg_color)
-
-                # Check if line highlighting is enabled in settings
-                highlight_enabled = True
-                if (self.settings_manager and
-                    hasattr(self.settings_manager, 'highlight_current_line')):
-                    highlight_enabled = self.settings_manager.highlight_current_line
-
-                # Set text color based on whether this is the current line
-                if is_current_line and highlight_enabled:
+                    highlight_color.setAlpha(int(self.current_line_opacity * 100))
+                    painter.fillRect(0, int(top), gutter_width, fm_height, highlight_color)
                     # Use the current line highlight color for the text when highlighting is enabled
-                    text_color = QColor(self.current_line_color)
-                elif is_current_line and not highlight_enabled:
-                    # Use the default line number color when highlighting is disabled
-                    # (per user request: the background should be normal, so should be the text)
-                    text_color = QColor(self.styles.get('DarkTheme', {}).get('StatusDefault', '#999999'))
+                    painter.setPen(current_line_color)
                 else:
-                    # Use foreground color from styles for other line numbers
-                    text_color = QColor(self.styles.get('DarkTheme', {}).get('StatusDefault', '#999999'))
-
-                painter.setPen(text_color)  # Color for line numbers
-
-                font = self.font()
-                font.setPointSize(font.pointSize() - 1)  # Slightly smaller font for line numbers
-                painter.setFont(font)
+                    # Even line numbers get a slightly different background; the current line
+                    # is drawn like the others when highlighting is disabled
+                    if number % 2 == 0:
+                        painter.fillRect(0, int(top), gutter_width, fm_height, alt_bg_color)
+                    painter.setPen(default_text_color)
 
                 # Draw the line number with padding
-                painter.drawText(3, int(top), int(self.line_numbers.width()) - 6,
-                               int(self.fontMetrics().height()),
-                               Qt.AlignRight | Qt.AlignVCenter, number)
+                self._draw_line_number(painter, number, top, gutter_width - 3)
 
                 # Draw fold markers (triangle) for foldable block starts
-                block_num = block_number
-                if block_num in self._fold_ranges:
-                    folded = (block_num in self._folded)
+                if block_number in self._fold_ranges:
+                    folded = (block_number in self._folded)
                     icon_char = '►' if folded else '▼'
-                    painter.setPen(QColor(self.styles.get('DarkTheme', {}).get('StatusDefault', '#999999')))
-                    painter.drawText(4, int(top), 12, int(self.fontMetrics().height()), Qt.AlignLeft | Qt.AlignVCenter, icon_char)
+                    painter.setPen(default_text_color)
+                    painter.drawText(4, int(top), 12, fm_height, Qt.AlignLeft | Qt.AlignVCenter, icon_char)
             block = block.next()
             top = bottom
-            bottom = top + self.blockBoundingRect(block).height()
             block_number += 1
 
     @pyqtProperty(float)
@@ -306,23 +620,25 @@ class CodeEditor(QPlainTextEdit):
     def current_line_opacity(self, value):
         # Only set the base opacity when not using the pulse animation
         self._current_line_opacity = value
-        self.line_numbers.update()  # Trigger repaint when opacity changes
-
-    def _update_pulse(self):
-        """Update the pulse animation"""
-        # Update pulse value
-        self._pulse_value += self._pulse_direction
-
-        # Reverse direction when reaching limits
-        if self._pulse_value >= 1.0:
-            self._pulse_value = 1.0
-            self._pulse_direction = -0.02  # Start decreasing
-        elif self._pulse_value <= 0.3:  # Minimum opacity for pulsing
-            self._pulse_value = 0.3
-            self._pulse_direction = 0.02  # Start increasing
-
-        # Trigger repaint to update the highlight
-        self.line_numbers.update()
+        # Only the current line's background depends on the opacity
+        self.line_numbers.update(self._current_line_gutter_rect())
+
+    def _on_pulse_value(self, value):
+        """Apply a pulse animation step, repainting only the current line number"""
+        self._pulse_value = value
+        self.line_numbers.update(self._current_line_gutter_rect())
+
+    def _current_line_gutter_rect(self):
+        """Rectangle of the current line's highlight in line number area coordinates"""
+        if self._current_line_rect is None:
+            block = self.textCursor().block()
+            top = self.blockBoundingGeometry(block).translated(self.contentOffset()).top()
+            self._current_line_rect = QRect(0, int(top), self.line_numbers.width(), int(self._fm_height))
+        return self._current_line_rect
+
+    def _invalidate_current_line_rect(self, *args):
+        """Forget the cached current line rect after the cursor moves or the view changes"""
+        self._current_line_rect = None
 
     def update_line_numbers_scroll(self, value):
         """Sync line number area with editor scrolling"""
@@ -335,17 +651,30 @@ class CodeEditor(QPlainTextEdit):
 
     def insertFromMimeData(self, source):
         """Override to make sure line numbers are updated after paste operations"""
-        super().insertFromMimeData(source)
+        # No particles for pasted text
+        self._suppress_particles = True
+        try:
+            super().insertFromMimeData(source)
+        finally:
+            self._suppress_particles = False
         self.update_line_number_area_width(0)
 
     def setFont(self, font):
         """Override setFont to update line numbers font as well"""
         super().setFont(font)
         self.line_numbers.setFont(font)
+        self._rebuild_gutter_glyphs()
         self.update_line_number_area_width(0)
 
     def on_text_changed(self):
         """Событие изменения текста - запускает эффект частиц если включено в настройках"""
+        # Track the document length so pastes and other bulk inserts can be told apart from typing
+        doc_length = self.document().characterCount()
+        grown_by = doc_length - self._last_doc_length
+        self._last_doc_length = doc_length
+        if self._suppress_particles or grown_by > 8:
+            return
+
         # Проверяем, включены ли частицы в настройках
         if (self.settings_manager and
             hasattr(self.settings_manager, 'typing_particles_enabled') and
@@ -356,12 +685,19 @@ class CodeEditor(QPlainTextEdit):
         if not self.particle_effect:
             return
 
+        # Emit at most one burst per frame (~16 ms) while typing fast
+        now = time.monotonic()
+        if now - self._last_particle_ts < 0.016:
+            return
+        self._last_particle_ts = now
+
         # Получаем текущую позицию курсора
         cursor = self.textCursor()
         current_pos = cursor.position()
 
         # Проверяем, есть ли предыдущий символ (чтобы не создавать частицы при удалении)
-        if current_pos > 0 and len(self.toPlainText()) > 0:
+        # characterCount() includes the final paragraph separator, so > 1 means non-empty
+        if current_pos > 0 and self.document().characterCount() > 1:
             # Создаем новый курсор и устанавливаем его на позицию предыдущего символа
             prev_cursor = QTextCursor(cursor)
             prev_cursor.setPosition(current_pos - 1, QTextCursor.MoveAnchor)
@@ -369,9 +705,9 @@ class CodeEditor(QPlainTextEdit):
             # Получаем прямоугольник для позиции предыдущего символа
             cursor_rect = self.cursorRect(prev_cursor)
 
-            # Преобразуем координаты в координаты виджета
-            pos = self.mapToGlobal(cursor_rect.topLeft())
-            local_pos = self.mapFromGlobal(pos)
+            # Mapping to global and back through the same widget is an identity,
+            # so use the rect directly instead of two window-system transforms
+            local_pos = cursor_rect.topLeft()
 
             # Calculate the absolute position within the document, considering horizontal scroll
             # The particle effect is a child widget that covers the entire editor area,
@@ -388,9 +724,6 @@ class CodeEditor(QPlainTextEdit):
             # Добавляем частицы в позицию последнего символа
             self.particle_effect.add_particles_at(x_pos, y_pos)
 
-            # Обновляем геометрию эффекта частиц, чтобы она соответствовала родительскому элементу
-            self.particle_effect.update_parent_geometry()
-
     def update_font_from_settings(self):
         """Update the editor font based on settings manager"""
         if self.settings_manager:
@@ -439,55 +772,44 @@ class CodeEditor(QPlainTextEdit):
                 # Remove the margin for line numbers
                 self.setViewportMargins(0, 0, 0, 0)
 
+    def schedule_fold_ranges(self):
+        """Recompute fold ranges after a short idle delay"""
+        self._fold_recompute_timer.start()
+
+    def _on_contents_change(self, position, chars_removed, chars_added):
+        """Reclassify only the blocks touched by an edit"""
+        tags = self._line_tags
+        if tags is None:
+            return
+        doc = self.document()
+        first = doc.findBlock(position).blockNumber()
+        last_block = doc.findBlock(position + chars_added)
+        last = last_block.blockNumber() if last_block.isValid() else doc.blockCount() - 1
+        # Lines first..last now replace lines first..old_last of the previous text
+        old_last = last - (doc.blockCount() - len(tags))
+        if first < 0 or old_last < first - 1 or old_last >= len(tags):
+            self._line_tags = None  # Out of sync, rebuild on the next compute
+            return
+        block = doc.findBlockByNumber(first)
+        new_tags = []
+        for _ in range(last - first + 1):
+            new_tags.append(_classify_line(block.text()))
+            block = block.next()
+        tags[first:old_last + 1] = new_tags
+
     def compute_fold_ranges(self):
         """Compute fold ranges for functions (function..end) and 'name:' YAML branches"""
         doc = self.document()
-        block = doc.firstBlock()
-        fold_ranges = {}
-        # Simple stack for function blocks
-        func_stack = []
-        # Simple stack for If Show Variant blocks
-        if_stack = []
-        line_no = 0
-        while block.isValid():
-            text = block.text()
-            stripped = text.strip()
-            # Function start
-            if re.match(r'^\s*(function|call)\b', text, re.IGNORECASE):
-                func_stack.append((line_no, text))
-            # Function end
-            if re.match(r'^\s*end\b', text, re.IGNORECASE) and func_stack:
-                start, _ = func_stack.pop()
-                fold_ranges[start] = line_no
-
-            # If Show Variant start -> push to stack until 'endif'
-            if re.match(r'^\s*If\s+Show\s+Variant\b', text, re.IGNORECASE):
-                if_stack.append((line_no, text))
-            if re.match(r'^\s*endif\b', text, re.IGNORECASE) and if_stack:
-                start, _ = if_stack.pop()
-                fold_ranges[start] = line_no
-
-            # name: (YAML dialog header) -> fold until next '---' separator, next name:, or EOF
-            m = re.match(r'^(\s*)name\s*:\s*.*', text, re.IGNORECASE)
-            if m:
-                # Find end by looking for separator '---' or next 'name:' header or EOF
-                search_block = block.next()
-                end_line = line_no
-                i = line_no + 1
-                while search_block.isValid():
-                    next_text = search_block.text()
-                    # If we encounter separator or another name:, stop
-                    if re.match(r'^\s*---\s*$', next_text) or re.match(r'^(\s*)name\s*:\s*.*', next_text, re.IGNORECASE):
-                        break
-                    end_line = i
-                    search_block = search_block.next()
-                    i += 1
-                # Only create fold range if there is at least one line to fold
-                if end_line > line_no:
-                    fold_ranges[line_no] = end_line
-            block = block.next()
-            line_no += 1
-        self._fold_ranges = fold_ranges
+        # Line classes are kept up to date per edit by _on_contents_change; only
+        # classify the whole document when there is no valid cache yet
+        if self._line_tags is None or len(self._line_tags) != doc.blockCount():
+            tags = []
+            block = doc.firstBlock()
+            while block.isValid():
+                tags.append(_classify_line(block.text()))
+                block = block.next()
+            self._line_tags = tags
+        self._fold_ranges = _match_fold_ranges(self._line_tags)
         # Remove folded states that are no longer valid
         self._folded = set(s for s in self._folded if s in self._fold_ranges)
         # Redraw gutter
@@ -495,6 +817,10 @@ class CodeEditor(QPlainTextEdit):
 
     def toggle_fold_at_line(self, block_number: int):
         """Toggle fold at a given block number if a fold range exists"""
+        # Make sure the ranges reflect any edit still waiting for the debounced rescan
+        if self._fold_recompute_timer.isActive():
+            self._fold_recompute_timer.stop()
+            self.compute_fold_ranges()
         if block_number not in self._fold_ranges:
             return
         if block_number in self._folded:
@@ -515,15 +841,21 @@ class CodeEditor(QPlainTextEdit):
         if end is None or end <= start:
             return
         doc = self.document()
-        for n in range(start + 1, end + 1):
-            block = doc.findBlockByNumber(n)
-            if not block.isValid():
-                continue
+        first_block = doc.findBlockByNumber(start + 1)
+        if not first_block.isValid():
+            return
+        # Walk the range with block.next(); a findBlockByNumber per line would be O(N) each
+        block = first_block
+        end_block = block
+        n = start + 1
+        while block.isValid() and n <= end:
             block.setVisible(unfold)
-            # Mark contents dirty to force layout (length of block text is sufficient)
-            doc.markContentsDirty(block.position(), len(block.text()))
-        # Force layout update
-        self.updateGeometry()
+            end_block = block
+            block = block.next()
+            n += 1
+        # Mark the whole folded range dirty at once so the layout is redone in a single pass
+        start_pos = first_block.position()
+        doc.markContentsDirty(start_pos, end_block.position() + end_block.length() - start_pos)
         self.viewport().update()
 
     def update_highlight_current_line_setting(self):
@@ -532,13 +864,10 @@ class CodeEditor(QPlainTextEdit):
             highlight_enabled = self.settings_manager.highlight_current_line
             if highlight_enabled:
                 # If highlighting is enabled, start the pulsing animation
-                self._pulse_value = 1.0  # Start with full opacity
-                self._pulse_direction = -0.02  # Start decreasing
-                if not self.pulse_timer.isActive():
-                    self.pulse_timer.start(30)  # Update every 30ms for smooth pulsing
+                self._restart_pulse()
             else:
-                # If highlighting is disabled, stop the pulse timer
-                self.pulse_timer.stop()
+                # If highlighting is disabled, stop the pulse
+                self._pulse_anim.stop()
                 # Clear the highlight with animation
                 self.current_line_animation.stop()
                 self.current_line_animation.setStartValue(self._current_line_opacity)
@@ -549,12 +878,11 @@ class CodeEditor(QPlainTextEdit):
         """Update styles for the line number area"""
         secondary_bg = self.styles.get('DarkTheme', {}).get('SecondaryBackground', '#2A2A2A')
         self.current_line_color = self.styles.get('DarkTheme', {}).get('ActiveLineNumberColor', '#C84B31')  # Update the highlight color
+        self._style_cache = None
         self.line_numbers.setStyleSheet(f"background-color: {secondary_bg};")
 
     def __del__(self):
         """Cleanup when the CodeEditor is destroyed"""
-        if self.pulse_timer:
-            self.pulse_timer.stop()
         if self.autocomplete_timer:
             self.autocomplete_timer.stop()
 
@@ -562,7 +890,7 @@ class CodeEditor(QPlainTextEdit):
         """Setup autocomplete functionality with parent window reference."""
         from .autocomplete_popup import AutocompletePopup
         self.parent_window = parent_window
-        self.autocomplete_popup = AutocompletePopup(parent=self, styles=self.styles)
+        self.autocomplete_popup = AutocompletePopup.get_for(self, styles=self.styles)
         self.autocomplete_popup.item_selected.connect(self._insert_autocomplete_item)
 
     def _show_autocomplete(self):
@@ -576,26 +904,33 @@ class CodeEditor(QPlainTextEdit):
         cursor_pos = cursor.positionInBlock()
 
         # Check if we're typing after "Jump To "
-        prefix = current_line[:cursor_pos]
-        if prefix.lower().endswith(self.jump_to_prefix.lower()):
+        if self._is_after_jump_to(current_line, cursor_pos):
             # Show autocomplete with cached dialog names
             dialog_names = getattr(self.parent_window, 'dialog_cache', [])
             if dialog_names:
-                self.autocomplete_popup.update_items(dialog_names)
+                # Rebuild the sorted index only when the window replaces its dialog cache or
+                # grows or shrinks it in place; the same pair keys the popup reuse
+                source = self._jump_to_source
+                if source is None or source[0] is not dialog_names or source[1] != len(dialog_names):
+                    self.autocomplete_popup.set_source(dialog_names)
+                    source = self._jump_to_source = (dialog_names, len(dialog_names))
+                ac_key = ('jump', source)
+                if self._reuse_autocomplete(ac_key):
+                    return
+                # The popup is triggered right after "Jump To ", before any name is typed
+                self.autocomplete_popup.filter('')
                 # Position the popup near the cursor
                 cursor_rect = self.cursorRect()
                 popup_pos = self.mapToGlobal(cursor_rect.bottomLeft())
                 self.autocomplete_popup.show_popup(popup_pos)
                 self.is_autocomplete_active = True
+                self._last_ac_key = ac_key
         else:
             # Check if we're typing a character name or SNIL command
             if cursor_pos > 0 and cursor_pos <= len(current_line):
-                # Get the word being typed (from the last space or beginning of line)
-                start_pos = 0
-                for i in range(cursor_pos - 1, -1, -1):
-                    if current_line[i] in [' ', ':', '\t', '\n', '\r']:
-                        start_pos = i + 1
-                        break
+                # Get the word being typed (from the last space or beginning of line);
+                # rfind scans in C, and -1 for all separators gives the start of the line
+                start_pos = max(current_line.rfind(sep, 0, cursor_pos) for sep in _WORD_SEPARATORS) + 1
 
                 current_word = current_line[start_pos:cursor_pos]
 
@@ -604,42 +939,68 @@ class CodeEditor(QPlainTextEdit):
                     # Check if we're on an empty line (only whitespace before current word)
                     line_before_cursor = current_line[:start_pos].strip()
                     is_empty_line = len(line_before_cursor) == 0
-
-                    # First, check for SNIL commands on empty lines
-                    if is_empty_line:
-                        snil_commands = getattr(self.parent_window, 'snil_commands', [])
-                        if snil_commands:
-                            # Filter commands that start with the current word (case-insensitive)
-                            filtered_commands = [cmd for cmd in snil_commands if cmd.lower().startswith(current_word.lower())]
-                            if filtered_commands:
-                                self.autocomplete_popup.update_items(filtered_commands)
-                                # Position the popup near the cursor
-                                cursor_rect = self.cursorRect()
-                                popup_pos = self.mapToGlobal(cursor_rect.bottomLeft())
-                                self.autocomplete_popup.show_popup(popup_pos)
-                                self.is_autocomplete_active = True
-
-                    # Always check for character names regardless of line content
-                    # Get character names that start with the current word
-                    char_names = getattr(self.parent_window, 'character_cache', [])
-                    if char_names:
-                        # Filter characters that start with the current word (case-insensitive)
-                        filtered_chars = [name for name in char_names if name.lower().startswith(current_word.lower())]
-                        if filtered_chars:
-                            # If SNIL commands were already added, add character names to them
-                            if self.is_autocomplete_active:
-                                # Get current items and add character names
-                                current_items = [self.autocomplete_popup.item(i).text() for i in range(self.autocomplete_popup.count())]
-                                all_items = current_items + filtered_chars
-                                self.autocomplete_popup.update_items(all_items)
-                            else:
-                                # No SNIL commands found, just show character names
-                                self.autocomplete_popup.update_items(filtered_chars)
-                                # Position the popup near the cursor
-                                cursor_rect = self.cursorRect()
-                                popup_pos = self.mapToGlobal(cursor_rect.bottomLeft())
-                                self.autocomplete_popup.show_popup(popup_pos)
-                                self.is_autocomplete_active = True
+                    # The tries hold lowercase keys, so the word is lowercased once for both lookups
+                    cw = current_word.lower()
+                    # Tries are rebuilt when their lists change, so they identify the sources.
+                    # The word goes into the key as typed, since the ranking depends on its case
+                    ac_trie = self._autocomplete_trie()
+                    ac_key = (current_word, is_empty_line, ac_trie)
+                    if self._reuse_autocomplete(ac_key):
+                        return
+                    self._last_ac_key = None
+
+                    # SNIL commands are only offered on empty lines; character names always
+                    matches = [word for word, tag in ac_trie.starts_with(cw)
+                               if is_empty_line or tag == 'char']
+                    if matches:
+                        # Words matching the typed case come first, then alphabetical; only the
+                        # top of that ranking is handed to the list model
+                        matches.sort(key=lambda s: (0 if s.startswith(current_word) else 1, s))
+                        del matches[AUTOCOMPLETE_LIMIT:]
+                        self.autocomplete_popup.update_items(matches)
+                        # Position the popup near the cursor
+                        cursor_rect = self.cursorRect()
+                        popup_pos = self.mapToGlobal(cursor_rect.bottomLeft())
+                        self.autocomplete_popup.show_popup(popup_pos)
+                        self.is_autocomplete_active = True
+                        self._last_ac_key = ac_key
+                else:
+                    # Too short to complete; whatever the popup listed no longer applies
+                    self._last_ac_key = None
+
+    def _is_after_jump_to(self, line, pos):
+        """Whether the text before pos ends with jump_to_prefix (case-insensitive)"""
+        # Only the tail that could match is lowercased, not everything before the cursor
+        n = len(self._jump_to_prefix_lc)
+        return pos >= n and line[pos - n:pos].lower() == self._jump_to_prefix_lc
+
+    def _reuse_autocomplete(self, ac_key):
+        """Re-show the popup as is when it already lists the suggestions for ac_key.
+
+        Returns True when nothing else needs to be done, e.g. after a key that did
+        not change the word being completed.
+        """
+        if ac_key != self._last_ac_key:
+            return False
+        if not self.autocomplete_popup.isVisible():
+            cursor_rect = self.cursorRect()
+            self.autocomplete_popup.show_popup(self.mapToGlobal(cursor_rect.bottomLeft()))
+        self.is_autocomplete_active = True
+        return True
+
+    def _autocomplete_trie(self):
+        """TaggedTrie over the parent window's SNIL commands and character names.
+
+        It is rebuilt when the window replaces either list or its length changes.
+        """
+        commands = getattr(self.parent_window, 'snil_commands', None) or _NO_WORDS
+        names = getattr(self.parent_window, 'character_cache', None) or _NO_WORDS
+        cached = self._ac_trie
+        if (cached is None or cached[0] is not commands or cached[1] is not names
+                or cached[2] != (len(commands), len(names))):
+            trie = TaggedTrie([(cmd, 'snil') for cmd in commands] + [(name, 'char') for name in names])
+            cached = self._ac_trie = (commands, names, (len(commands), len(names)), trie)
+        return cached[3]
 
     def _insert_autocomplete_item(self, item_text):
         """Insert the selected autocomplete item into the text."""
@@ -649,7 +1010,7 @@ class CodeEditor(QPlainTextEdit):
             cursor_pos = cursor.positionInBlock()
 
             # Find the position where "Jump To " ends (for dialog autocompletion)
-            prefix_pos = current_line.lower().rfind(self.jump_to_prefix.lower())
+            prefix_pos = current_line.lower().rfind(self._jump_to_prefix_lc)
             if prefix_pos != -1:
                 # This is a "Jump To" autocompletion
                 # Move cursor to end of current line after "Jump To "
@@ -661,12 +1022,8 @@ class CodeEditor(QPlainTextEdit):
                 cursor.insertText(item_text)
             else:
                 # This is a character name autocompletion
-                # Find the start of the word being typed
-                start_pos = 0
-                for i in range(cursor_pos - 1, -1, -1):
-                    if current_line[i] in [' ', ':', '\t', '\n', '\r']:
-                        start_pos = i + 1
-                        break
+                # Find the start of the word being typed, the same way _show_autocomplete does
+                start_pos = max(current_line.rfind(sep, 0, cursor_pos) for sep in _WORD_SEPARATORS) + 1
 
                 # Replace the typed portion with the full character name
                 word_start = cursor.block().position() + start_pos
@@ -681,8 +1038,8 @@ class CodeEditor(QPlainTextEdit):
         """Handle key press events for autocomplete functionality."""
         # If autocomplete popup is visible, handle navigation keys
         if self.is_autocomplete_active and self.autocomplete_popup and self.autocomplete_popup.isVisible():
-            if event.key() in [Qt.Key_Up, Qt.Key_Down, Qt.Key_Return, Qt.Key_Enter, Qt.Key_Escape]:
-                self.autocomplete_popup.keyPressEvent(event)
+            if self.autocomplete_popup.handle_key(event.key()):
+                event.accept()
                 return
             elif event.key() not in [Qt.Key_Shift, Qt.Key_Control, Qt.Key_Alt, Qt.Key_Meta]:
                 # If user starts typing while popup is visible, hide it
@@ -693,11 +1050,11 @@ class CodeEditor(QPlainTextEdit):
         if event.key() not in [Qt.Key_Shift, Qt.Key_Control, Qt.Key_Alt, Qt.Key_Meta]:
             # Determine the appropriate delay based on context
             # For character names, use 200ms delay; for Jump To, use 300ms delay
-            current_line = self.textCursor().block().text()
-            cursor_pos = self.textCursor().positionInBlock()
-            prefix = current_line[:cursor_pos]
+            cursor = self.textCursor()
+            current_line = cursor.block().text()
+            cursor_pos = cursor.positionInBlock()
 
-            if prefix.lower().endswith(self.jump_to_prefix.lower()):
+            if self._is_after_jump_to(current_line, cursor_pos):
                 delay = 300  # 300ms delay for Jump To
             else:
                 delay = 200  # 200ms delay for character names
@@ -713,6 +1070,7 @@ class CodeEditor(QPlainTextEdit):
         self.styles = styles
         # Update the current line highlight color from the new styles
         self.current_line_color = styles.get('DarkTheme', {}).get('ActiveLineNumberColor', '#C84B31')
+        self._style_cache = None
         if self.particle_effect:
             particle_colors = {
                 'ParticlePrimaryColor': styles.get('DarkTheme', {}).get('ParticlePrimaryColor', '#FF6B6B'),
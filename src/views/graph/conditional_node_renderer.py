@@ -4,8 +4,20 @@ This creates a visual representation that clearly shows the branching logic.
 """
 
 from PyQt5.QtWidgets import QWidget
-from PyQt5.QtCore import Qt, QPointF, QRectF
-from PyQt5.QtGui import QPainter, QColor, QFont, QPen
+from PyQt5.QtCore import Qt, QPointF
+from PyQt5.QtGui import QPainter, QColor, QFont, QPen, QBrush
+from .paint_cache import SCRATCH_RECT, brushes, static_text
+
+
+# Paint resources shared by every conditional node, built once instead of per draw
+_HEADER_FONT = QFont("Segoe UI", 9, QFont.Bold)
+_CONTENT_FONT = QFont("Consolas", 10)
+_BODY_PEN = QPen(QColor(10, 10, 10), 1.5)
+_INDICATOR_PEN = QPen(QColor(0, 0, 0), 1.0)
+_PORT_PEN = QPen(QColor(0, 0, 0, 100), 1.0)
+_WHITE_PEN = QPen(QColor(255, 255, 255))
+_BRANCH_BRUSH = QBrush(QColor(255, 255, 0))  # Yellow for branching
+_DEFAULT_COLOR = QColor(128, 64, 128)
 
 
 class ConditionalNodeRenderer:
@@ -13,6 +25,8 @@ class ConditionalNodeRenderer:
     Renderer for conditional nodes, particularly for 'if show variant' logic.
     This creates a visual representation that clearly shows the branching logic.
     """
+
+    __slots__ = ()  # Stateless; one shared instance lives in NodeRendererFactory
     
     def draw_node(self, painter: QPainter, node, canvas):
         """
@@ -23,45 +37,50 @@ class ConditionalNodeRenderer:
             node: The node object to draw
             canvas: The canvas that contains the node
         """
+        rect = node.get_rect()
         # Get the base color for conditional nodes
-        base_color = canvas.type_colors.get('condition', QColor(128, 64, 128))
-        body_color = base_color.darker(220)
+        base_color = canvas.type_colors.get('condition', _DEFAULT_COLOR)
+        base_brush, body_brush = brushes(base_color)
 
         # Draw the node body with special styling for conditional nodes
-        painter.setPen(QPen(QColor(10, 10, 10), 1.5))
-        painter.setBrush(body_color)
-        painter.drawRoundedRect(node.get_rect(), 8.0, 8.0)
+        painter.setPen(_BODY_PEN)
+        painter.setBrush(body_brush)
+        painter.drawRoundedRect(rect, 8.0, 8.0)
 
         # Draw the header with special styling
-        hdr_rect = QRectF(node.x, node.y, node.width, node.hdr_h)
+        SCRATCH_RECT.setRect(node.x, node.y, node.width, node.hdr_h)
         painter.setPen(Qt.NoPen)
-        painter.setBrush(base_color)
-        painter.drawRoundedRect(hdr_rect, 8.0, 8.0)
-        painter.drawRect(QRectF(node.x, node.y + node.hdr_h - 5.0, node.width, 5.0))
+        painter.setBrush(base_brush)
+        painter.drawRoundedRect(SCRATCH_RECT, 8.0, 8.0)
+        SCRATCH_RECT.setRect(node.x, node.y + node.hdr_h - 5.0, node.width, 5.0)
+        painter.drawRect(SCRATCH_RECT)
 
         # Draw the node type in the header
-        painter.setPen(QColor(255, 255, 255))
-        painter.setFont(QFont("Segoe UI", 9, QFont.Bold))
-        painter.drawText(hdr_rect.adjusted(12, 0, -12, 0), Qt.AlignVCenter, "CONDITION")
+        painter.setPen(_WHITE_PEN)
+        painter.setFont(_HEADER_FONT)
+        # The header text never changes, so its layout is prepared once; placed like AlignVCenter
+        header, _, header_h = static_text("CONDITION", _HEADER_FONT)
+        painter.drawStaticText(QPointF(node.x + 12, node.y + (node.hdr_h - header_h) / 2), header)
 
         # Draw the condition content with special formatting
-        painter.setFont(QFont("Consolas", 10))
+        painter.setFont(_CONTENT_FONT)
         flags = Qt.AlignLeft | Qt.TextWordWrap | Qt.TextWrapAnywhere
-        content_rect = node.get_rect().adjusted(15, node.hdr_h + 12, -15, -12)
+        SCRATCH_RECT.setRect(node.x + 15, node.y + node.hdr_h + 12,
+                             node.width - 30, node.height - node.hdr_h - 24)
         
         # Highlight 'if' and 'show' keywords if present
         content = node.content
-        painter.drawText(content_rect, flags, content)
+        painter.drawText(SCRATCH_RECT, flags, content)
 
         # Draw special branching indicators
         # Draw a small icon or symbol to indicate this is a conditional node
-        branch_indicator_rect = QRectF(node.x + node.width - 20, node.y + 5, 15, 15)
-        painter.setBrush(QColor(255, 255, 0))  # Yellow for branching
-        painter.setPen(QPen(QColor(0, 0, 0), 1.0))
-        painter.drawEllipse(branch_indicator_rect)
+        SCRATCH_RECT.setRect(node.x + node.width - 20, node.y + 5, 15, 15)
+        painter.setBrush(_BRANCH_BRUSH)
+        painter.setPen(_INDICATOR_PEN)
+        painter.drawEllipse(SCRATCH_RECT)
         
         # Draw the connection ports
-        painter.setBrush(canvas.color_link)
-        painter.setPen(QPen(QColor(0, 0, 0, 100), 1.0))
+        painter.setBrush(brushes(canvas.color_link)[0])
+        painter.setPen(_PORT_PEN)
         painter.drawEllipse(node.enter_port, 5.0, 5.0)
         painter.drawEllipse(node.exit_port, 5.0, 5.0)
\ No newline at end of file
@@ -1,79 +1,117 @@
+import re
+from functools import lru_cache
 from PyQt5.QtWidgets import QWidget
-from PyQt5.QtCore import Qt, QPointF, QRectF
-from PyQt5.QtGui import QPainter, QColor, QFont, QPen, QLinearGradient
+from PyQt5.QtCore import Qt, QPointF
+from PyQt5.QtGui import QPainter, QColor, QFont, QPen, QBrush, QLinearGradient
+from .paint_cache import SCRATCH_RECT, brushes, static_text
+
+# Paint resources shared by every node, built once instead of per draw
+_HEADER_FONT = QFont("Segoe UI", 9, QFont.Bold)
+_CONTENT_FONT = QFont("Consolas", 10)
+_LABEL_FONT = QFont("Segoe UI", 6)
+_BODY_PEN = QPen(QColor(10, 10, 10), 1.5)
+_PORT_PEN = QPen(QColor(0, 0, 0, 100), 1.0)
+_TRUE_PEN = QPen(QColor(100, 255, 100, 150), 1.0)
+_FALSE_PEN = QPen(QColor(255, 100, 100, 150), 1.0)
+_WHITE_PEN = QPen(QColor(255, 255, 255))
+_LABEL_PEN = QPen(QColor(200, 200, 200))  # Light gray for visual indicators
+_TRUE_BRUSH = QBrush(QColor(100, 255, 100, 100))  # Semi-transparent green for True
+_FALSE_BRUSH = QBrush(QColor(255, 100, 100, 100))  # Semi-transparent red for False
+_DEFAULT_COLOR = QColor(128, 64, 128)
+# Any keyword the section parser looks for. ASCII-only case folding finds exactly the
+# lines whose str.lower() contains one of them.
+_SECTION_RE = re.compile(r'true:|false:|variants:|option|endif', re.IGNORECASE | re.ASCII)
+
+
+@lru_cache(maxsize=256)
+def _parse_if_show_variant(content):
+    """Return the text drawn in an If Show Variant node: its variants and True/False branches.
+
+    The result only depends on the content string, so nodes that did not change
+    between repaints are not parsed again.
+    """
+    # Parse content to extract variants, true and false branches
+    content_lines = content.split('\n')
+    variants_section = []
+    true_section = []
+    false_section = []
+
+    current_section = None
+    for line in content_lines:
+        line = line.strip()
+        # Most lines mention no keyword; one regex scan rules those out, and only the
+        # others are lowered for the checks below
+        low_line = line.lower() if _SECTION_RE.search(line) else ''
+        if 'true:' in low_line:
+            current_section = 'true'
+        elif 'false:' in low_line:
+            current_section = 'false'
+        elif 'variants:' in low_line or 'option' in low_line:
+            variants_section.append(line)
+        elif current_section == 'true' and line and not low_line.startswith('endif'):
+            true_section.append(line)
+        elif current_section == 'false' and line and not low_line.startswith('endif'):
+            false_section.append(line)
+
+    # Create a custom content display that shows the branching
+    content_parts = []
+    if variants_section:
+        content_parts.append("Variants:")
+        content_parts.extend("  • " + v for v in variants_section if v.lower() != 'variants:')
+
+    if true_section:
+        content_parts.append("True:")
+        content_parts.extend("  " + line for line in true_section)
+
+    if false_section:
+        content_parts.append("False:")
+        content_parts.extend("  " + line for line in false_section)
+
+    return "\n".join(content_parts) if content_parts else content
+
 
 class IfShowVariantNodeRenderer:
+    __slots__ = ()  # Stateless; one shared instance lives in NodeRendererFactory
+
     def draw_node(self, painter: QPainter, node, canvas):
+        rect = node.get_rect()
         # Get the base color for conditional nodes, similar to standard renderer
-        base_color = canvas.type_colors.get('condition', QColor(128, 64, 128))
-        body_color = base_color.darker(220)
+        base_color = canvas.type_colors.get('condition', _DEFAULT_COLOR)
+        base_brush, body_brush = brushes(base_color)
 
         # Draw the node body with rounded corners, similar to standard renderer
-        painter.setPen(QPen(QColor(10, 10, 10), 1.5))
-        painter.setBrush(body_color)
-        painter.drawRoundedRect(node.get_rect(), 8.0, 8.0)
+        painter.setPen(_BODY_PEN)
+        painter.setBrush(body_brush)
+        painter.drawRoundedRect(rect, 8.0, 8.0)
 
         # Draw the header, similar to standard renderer but with specific text
-        hdr_rect = QRectF(node.x, node.y, node.width, node.hdr_h)
+        SCRATCH_RECT.setRect(node.x, node.y, node.width, node.hdr_h)
         painter.setPen(Qt.NoPen)
-        painter.setBrush(base_color)
-        painter.drawRoundedRect(hdr_rect, 8.0, 8.0)
-        painter.drawRect(QRectF(node.x, node.y + node.hdr_h - 5.0, node.width, 5.0))
+        painter.setBrush(base_brush)
+        painter.drawRoundedRect(SCRATCH_RECT, 8.0, 8.0)
+        SCRATCH_RECT.setRect(node.x, node.y + node.hdr_h - 5.0, node.width, 5.0)
+        painter.drawRect(SCRATCH_RECT)
 
         # Draw the node type in the header
-        painter.setPen(QColor(255, 255, 255))
-        painter.setFont(QFont("Segoe UI", 9, QFont.Bold))
-        painter.drawText(hdr_rect.adjusted(12, 0, -12, 0), Qt.AlignVCenter, "IF SHOW VARIANT")
-
-        # Parse content to extract variants, true and false branches
-        content_lines = node.content.split('\n')
-        variants_section = []
-        true_section = []
-        false_section = []
-
-        current_section = None
-        for line in content_lines:
-            line = line.strip()
-            if 'true:' in line.lower():
-                current_section = 'true'
-            elif 'false:' in line.lower():
-                current_section = 'false'
-            elif 'variants:' in line.lower() or 'option' in line.lower():
-                variants_section.append(line)
-            elif current_section == 'true' and line and not line.lower().startswith('endif'):
-                true_section.append(line)
-            elif current_section == 'false' and line and not line.lower().startswith('endif'):
-                false_section.append(line)
+        painter.setPen(_WHITE_PEN)
+        painter.setFont(_HEADER_FONT)
+        # The header text never changes, so its layout is prepared once; placed like AlignVCenter
+        header, _, header_h = static_text("IF SHOW VARIANT", _HEADER_FONT)
+        painter.drawStaticText(QPointF(node.x + 12, node.y + (node.hdr_h - header_h) / 2), header)
 
         # Draw the node content with branching visualization
-        painter.setFont(QFont("Consolas", 10))
+        painter.setFont(_CONTENT_FONT)
         flags = Qt.AlignLeft | Qt.TextWordWrap | Qt.TextWrapAnywhere
 
-        # Create a custom content display that shows the branching
-        content_parts = []
-        if variants_section:
-            content_parts.append("Variants:")
-            for variant in [v for v in variants_section if v.lower() != 'variants:']:
-                content_parts.append(f"  • {variant}")
-
-        if true_section:
-            content_parts.append("True:")
-            for line in true_section:
-                content_parts.append(f"  {line}")
-
-        if false_section:
-            content_parts.append("False:")
-            for line in false_section:
-                content_parts.append(f"  {line}")
-
         # Draw the combined content
-        display_content = "\n".join(content_parts) if content_parts else node.content
-        content_rect = node.get_rect().adjusted(15, node.hdr_h + 12, -15, -12)
-        painter.drawText(content_rect, flags, display_content)
+        display_content = _parse_if_show_variant(node.content)
+        SCRATCH_RECT.setRect(node.x + 15, node.y + node.hdr_h + 12,
+                             node.width - 30, node.height - node.hdr_h - 24)
+        painter.drawText(SCRATCH_RECT, flags, display_content)
 
         # Draw the connection ports - standard input/output like other nodes
-        painter.setBrush(canvas.color_link)
-        painter.setPen(QPen(QColor(0, 0, 0, 100), 1.0))
+        painter.setBrush(brushes(canvas.color_link)[0])
+        painter.setPen(_PORT_PEN)
 
         # Draw the main input port (left side)
         painter.drawEllipse(node.enter_port, 5.0, 5.0)
@@ -88,16 +126,18 @@ class IfShowVariantNodeRenderer:
         false_exit_pos = node.get_false_port()
 
         # Draw visual indicators for True/False (not actual connection ports)
-        painter.setBrush(QColor(100, 255, 100, 100))  # Semi-transparent green for True
-        painter.setPen(QPen(QColor(100, 255, 100, 150), 1.0))
+        painter.setBrush(_TRUE_BRUSH)
+        painter.setPen(_TRUE_PEN)
         painter.drawEllipse(true_exit_pos, 3.0, 3.0)
 
-        painter.setBrush(QColor(255, 100, 100, 100))  # Semi-transparent red for False
-        painter.setPen(QPen(QColor(255, 100, 100, 150), 1.0))
+        painter.setBrush(_FALSE_BRUSH)
+        painter.setPen(_FALSE_PEN)
         painter.drawEllipse(false_exit_pos, 3.0, 3.0)
 
         # Draw port labels
-        painter.setPen(QColor(200, 200, 200))  # Light gray for visual indicators
-        painter.setFont(QFont("Segoe UI", 6))
-        painter.drawText(QRectF(true_exit_pos.x() - 8, true_exit_pos.y() - 10, 16, 8), Qt.AlignCenter, "T")
-        painter.drawText(QRectF(false_exit_pos.x() - 8, false_exit_pos.y() - 10, 16, 8), Qt.AlignCenter, "F")
\ No newline at end of file
+        painter.setPen(_LABEL_PEN)
+        painter.setFont(_LABEL_FONT)
+        # Centered in a 16x8 box above each indicator, like AlignCenter
+        for label, pos in (("T", true_exit_pos), ("F", false_exit_pos)):
+            static, w, h = static_text(label, _LABEL_FONT)
+            painter.drawStaticText(QPointF(pos.x() - w / 2, pos.y() - 6 - h / 2), static)
\ No newline at end of file
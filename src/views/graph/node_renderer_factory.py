@@ -4,12 +4,16 @@ from .standard_node_renderer import StandardNodeRenderer
 from .conditional_node_renderer import ConditionalNodeRenderer
 from .if_show_variant_node_renderer import IfShowVariantNodeRenderer
 
+_CONDITION_TYPES = frozenset(('condition', 'conditional', 'if'))
+
 class NodeRenderer(ABC):
     @abstractmethod
     def draw_node(self, painter: QPainter, node, canvas):
         pass
 
 class NodeRendererFactory:
+    __slots__ = ('renderers',)
+
     def __init__(self):
         self.renderers = {
             'standard': StandardNodeRenderer(),
@@ -18,16 +22,33 @@ class NodeRendererFactory:
         }
 
     def get_renderer(self, node_type: str, node_content: str = "") -> 'NodeRenderer':
-        low_content = node_content.lower()
+        return self.renderers[self._renderer_key(node_type, node_content)]
+
+    def renderer_for(self, node) -> 'NodeRenderer':
+        """Renderer for node; the choice is cached on the node until its type or content changes.
+
+        Node classes that declare __slots__ need a '_renderer_key' slot for the cache.
+        """
+        key = getattr(node, '_renderer_key', None)
+        if key is None:
+            key = node._renderer_key = self._renderer_key(node.type, node.content)
+        return self.renderers[key]
+
+    @staticmethod
+    def _renderer_key(node_type: str, node_content: str) -> str:
         low_type = node_type.lower()
-        
-        if 'if show variant' in low_content or 'variants:' in low_content or 'variant' in low_type:
-            return self.renderers['if_show_variant']
-        
-        if low_type in ['condition', 'conditional', 'if']:
-            return self.renderers['condition']
-
-        return self.renderers['standard']
+        # The type alone decides most nodes; only scan the content when it has to
+        if 'variant' in low_type:
+            return 'if_show_variant'
+
+        low_content = node_content.lower()
+        if 'if show variant' in low_content or 'variants:' in low_content:
+            return 'if_show_variant'
+
+        if low_type in _CONDITION_TYPES:
+            return 'condition'
+
+        return 'standard'
 
     def register_renderer(self, node_type: str, renderer: 'NodeRenderer'):
         self.renderers[node_type] = renderer
\ No newline at end of file
@@ -0,0 +1,33 @@
+"""
+Paint resources shared by the node renderers: brushes per color, prepared static
+texts and a scratch rectangle, each created once for all renderers.
+"""
+
+from PyQt5.QtCore import Qt, QRectF
+from PyQt5.QtGui import QBrush, QFontMetricsF, QStaticText, QTransform
+
+
+_STATIC_TEXTS = {}  # (text, font key) -> (QStaticText, width, height)
+_BRUSHES = {}  # color rgba -> (brush of the color, brush of its darker(220) body color)
+SCRATCH_RECT = QRectF()  # Reused for header, content and indicator rects; painting is single-threaded
+
+
+def brushes(color):
+    """Solid brushes for color and its darker body color, so setBrush gets no temporary QBrush"""
+    entry = _BRUSHES.get(color.rgba())
+    if entry is None:
+        entry = _BRUSHES[color.rgba()] = (QBrush(color), QBrush(color.darker(220)))
+    return entry
+
+
+def static_text(text, font):
+    """Laid out QStaticText for a fixed string in font, with the string's width and line height"""
+    key = (text, font.key())
+    entry = _STATIC_TEXTS.get(key)
+    if entry is None:
+        static = QStaticText(text)
+        static.setTextFormat(Qt.PlainText)
+        static.prepare(QTransform(), font)
+        fm = QFontMetricsF(font)
+        entry = _STATIC_TEXTS[key] = (static, fm.horizontalAdvance(text), fm.height())
+    return entry
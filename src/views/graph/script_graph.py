@@ -1,17 +1,60 @@
 import re
+import json
 import math
 import sys
 import os
+from functools import lru_cache
 from typing import List, Dict, Tuple
 from PyQt5.QtWidgets import QWidget, QVBoxLayout, QLabel, QMainWindow, QTabWidget
-from PyQt5.QtCore import Qt, QPointF, QRectF, QRect, QSize, QByteArray
+from PyQt5.QtCore import Qt, QPointF, QLineF, QRectF, QRect, QSize, QByteArray, QTimer
 from PyQt5.QtGui import QPainter, QColor, QFont, QPen, QPainterPath, QTransform, QFontMetrics, QIcon, QPixmap
 from PyQt5.QtSvg import QSvgRenderer
 from .node_renderer_factory import NodeRendererFactory
 
+try:
+    # Optional: vectorized link control points for large graphs
+    import numpy as np
+except ImportError:
+    np = None
+
+_COND_RE = re.compile(r'^\s*if\s+.*', re.IGNORECASE)
+_NAME_RE = re.compile(r'^name:\s*(.+)', re.MULTILINE | re.IGNORECASE)
+
+# Link count from which control points are computed with NumPy; below it building the arrays costs more
+_LINK_ARRAY_MIN_LINKS = 256
+
+_CONTENT_FONT = ("Consolas", 10)  # Family and point size of the node content text
+_FONT_METRICS = {}  # (family, point size) -> QFontMetrics
+
+
+@lru_cache(maxsize=4096)
+def _measure_height(content: str, inner_width: int, font_family: str, font_pt: int) -> int:
+    """Height of content wrapped to inner_width; scripts repeat many short lines, so it is memoized"""
+    metrics = _FONT_METRICS.get((font_family, font_pt))
+    if metrics is None:
+        metrics = _FONT_METRICS[(font_family, font_pt)] = QFontMetrics(QFont(font_family, font_pt))
+    # A single line that fits needs no word-wrap layout: it is one line high
+    if '\n' not in content and metrics.horizontalAdvance(content) <= inner_width:
+        return metrics.height()
+    flags = Qt.AlignLeft | Qt.TextWordWrap | Qt.TextWrapAnywhere
+    return metrics.boundingRect(QRect(0, 0, inner_width, 1000), flags, content).height()
+
+
+@lru_cache(maxsize=1)
+def _load_node_types_config_cached(resource_path: str) -> dict:
+    """Parsed node types config; the file is static, so it is read once per process"""
+    with open(resource_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
 class ScriptGraphNode:
+    # Graphs can hold thousands of nodes; slots drop the per-instance dict
+    __slots__ = ('id', '_renderer_key', '_type', '_content',
+                 'x', 'y', 'width', 'height', 'hdr_h')
+
     def __init__(self, node_id: str, node_type: str, content: str, x: float = 0, y: float = 0):
         self.id = node_id
+        self._renderer_key = None  # Set by NodeRendererFactory.renderer_for
         self.type = node_type
         self.content = content
         self.x = x
@@ -20,20 +63,34 @@ class ScriptGraphNode:
         self.height = 90.0
         self.hdr_h = 32.0
 
-    def calculate_height(self, font_metrics: QFontMetrics):
-        flags = Qt.AlignLeft | Qt.TextWordWrap | Qt.TextWrapAnywhere
-        inner_width = int(self.width - 30)
-        
-        text_rect = font_metrics.boundingRect(
-            QRect(0, 0, inner_width, 1000),
-            flags,
-            self.content
-        )
+    @property
+    def type(self):
+        return self._type
+
+    @type.setter
+    def type(self, value):
+        self._type = value
+        self.invalidate_renderer()
+
+    @property
+    def content(self):
+        return self._content
+
+    @content.setter
+    def content(self, value):
+        self._content = value
+        self.invalidate_renderer()
+
+    def invalidate_renderer(self):
+        self._renderer_key = None
+
+    def calculate_height(self, font: Tuple[str, int] = _CONTENT_FONT):
+        text_height = _measure_height(self.content, int(self.width - 30), *font)
         
         if "variant" in self.type.lower() or "variant" in self.content.lower():
-            self.height = max(160.0, self.hdr_h + text_rect.height() + 80)
+            self.height = max(160.0, self.hdr_h + text_height + 80)
         else:
-            self.height = max(90.0, self.hdr_h + text_rect.height() + 40)
+            self.height = max(90.0, self.hdr_h + text_height + 40)
 
     def get_rect(self):
         return QRectF(self.x, self.y, self.width, self.height)
@@ -62,6 +119,7 @@ class ScriptGraphWindow(QMainWindow):
         self.setWindowTitle("Script Graph Visualization")
         self.setGeometry(100, 100, 1200, 700)
         self.tab_widget = None
+        self._graph_icon = None  # Tab icon, rendered from the SVG on the first parse
         self.init_ui()
 
     def _get_resource_path(self, relative_path: str) -> str:
@@ -144,14 +202,22 @@ class ScriptGraphWindow(QMainWindow):
             QTabBar::tab:hover { background-color: #3A3A3A; }
             QTabBar::tab:!selected { margin-top: 2px; }
         """)
+        self.tab_widget.currentChanged.connect(self._on_tab_changed)
         layout.addWidget(self.tab_widget)
 
+    def _on_tab_changed(self, index):
+        # Section graphs are laid out when their tab is first viewed, see parse_script_content
+        canvas = self.tab_widget.widget(index)
+        if canvas is not None:
+            canvas.populate()
+
+    def reload_node_types(self):
+        """Drop the memoized node types config so the next parse reads the file again"""
+        _load_node_types_config_cached.cache_clear()
+
     def _load_node_types_config(self):
-        import json
         try:
-            config_path = self._get_resource_path('node_types_config.json')
-            with open(config_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            return _load_node_types_config_cached(self._get_resource_path('node_types_config.json'))
         except Exception:
             return {
                 "node_types": [
@@ -171,32 +237,47 @@ class ScriptGraphWindow(QMainWindow):
     def parse_script_content(self, content: str):
         sections = content.split('\n---\n')
         self.tab_widget.clear()
-        graph_svg_content = self._load_graph_icon()
-        graph_icon = self._create_icon_from_svg_content(graph_svg_content)
+        if self._graph_icon is None:
+            self._graph_icon = self._create_icon_from_svg_content(self._load_graph_icon())
+        graph_icon = self._graph_icon
         node_types_config = self._load_node_types_config()
-        node_types = node_types_config.get("node_types", [])
         default_node_type = node_types_config.get("default_node_type", "dialogue")
+        # Patterns are compiled once per parse, not matched from source for every line. The node
+        # type patterns form one alternation with a named group t0, t1, ... per type; the first
+        # alternative that matches wins, like trying the patterns in order
+        node_types = node_types_config.get("node_types", [])
+        type_names = [nc.get("name", default_node_type) for nc in node_types]
+        type_re = re.compile('|'.join(f'(?P<t{i}>{nc.get("pattern", "")})' for i, nc in enumerate(node_types)),
+                             re.IGNORECASE) if node_types else None
+
+        def classify(line):
+            m = type_re.match(line) if type_re else None
+            return type_names[int(m.lastgroup[1:])] if m else default_node_type
+
+        # The ignore patterns are folded into one alternation, so a line takes a single match
         ignore_patterns = node_types_config.get("ignore_patterns", [])
+        ignore_re = re.compile('|'.join(f'(?:{p})' for p in ignore_patterns), re.IGNORECASE) if ignore_patterns else None
 
         for i, section in enumerate(sections):
             section = section.strip()
             if not section: continue
-            name_match = re.search(r'^name:\s*(.+)', section, re.MULTILINE | re.IGNORECASE)
+            name_match = _NAME_RE.search(section)
             section_name = name_match.group(1).strip() if name_match else f"Section {i+1}"
             graph_canvas = ScriptGraphCanvas()
-            lines = section.split('\n')
+            # Every line is stripped once here; the conditional block parser gets them stripped too
+            lines = [line.strip() for line in section.split('\n')]
             nodes, connections = [], []
             node_id_counter = 0
             prev_node = None
             processed_lines = []
             line_idx = 0
             while line_idx < len(lines):
-                line = lines[line_idx].strip()
-                if re.match(r'^\s*if\s+.*', line, re.IGNORECASE) or 'If Show Variant' in line:
+                line = lines[line_idx]
+                if _COND_RE.match(line) or 'If Show Variant' in line:
                     conditional_block = [line]
                     line_idx += 1
                     while line_idx < len(lines):
-                        next_line = lines[line_idx].strip()
+                        next_line = lines[line_idx]
                         conditional_block.append(next_line)
                         line_idx += 1
                         if next_line.lower() == 'endif': break
@@ -209,7 +290,7 @@ class ScriptGraphWindow(QMainWindow):
             for item_type, item_lines in processed_lines:
                 if item_type == 'conditional':
                     c_nodes, c_conns, l_true, l_false = self._parse_conditional_block(
-                        item_lines, node_id_counter, nodes, node_types, default_node_type, ignore_patterns
+                        item_lines, node_id_counter, nodes, classify, ignore_re
                     )
                     nodes.extend(c_nodes)
                     connections.extend(c_conns)
@@ -221,13 +302,9 @@ class ScriptGraphWindow(QMainWindow):
                     prev_node = None
                 else:
                     for line in item_lines:
-                        if any(re.match(p, line, re.IGNORECASE) for p in ignore_patterns): continue
-                        node_type = default_node_type
-                        for nc in node_types:
-                            if re.match(nc.get("pattern", ""), line, re.IGNORECASE):
-                                node_type = nc.get("name", default_node_type)
-                                if node_type == "function_call": node_type = "function"
-                                break
+                        if ignore_re and ignore_re.match(line): continue
+                        node_type = classify(line)
+                        if node_type == "function_call": node_type = "function"
                         node = ScriptGraphNode(f"n_{node_id_counter}", node_type, line)
                         nodes.append(node)
                         for ce in conditional_end_nodes: connections.append((ce.id, node.id))
@@ -235,20 +312,23 @@ class ScriptGraphWindow(QMainWindow):
                         conditional_end_nodes = []
                         prev_node = node
                         node_id_counter += 1
-            graph_canvas.set_data(nodes, connections)
+            # Only the current tab is laid out now (addTab of the first tab selects it);
+            # the others wait until they are viewed
+            graph_canvas.set_data_deferred(nodes, connections)
             self.tab_widget.addTab(graph_canvas, graph_icon, section_name)
 
-    def _parse_conditional_block(self, lines, start_id, existing_nodes, node_types, default_node_type, ignore_patterns):
+    def _parse_conditional_block(self, lines, start_id, existing_nodes, classify, ignore_re):
         if not lines: return [], [], None, None
         node_id_counter = start_id
-        condition_node = ScriptGraphNode(f"n_{node_id_counter}", "if_show_variant", lines[0].strip())
+        condition_node = ScriptGraphNode(f"n_{node_id_counter}", "if_show_variant", lines[0])
         node_id_counter += 1
         i, true_block, false_block, current_block = 1, [], [], None
         while i < len(lines):
-            line = lines[i].strip()
-            if line.lower() == 'true:': current_block = true_block
-            elif line.lower() == 'false:': current_block = false_block
-            elif line.lower() == 'endif': break
+            line = lines[i]
+            low = line.lower()
+            if low == 'true:': current_block = true_block
+            elif low == 'false:': current_block = false_block
+            elif low == 'endif': break
             elif current_block is not None: current_block.append(line)
             else: condition_node.content += f"\n{line}"
             i += 1
@@ -256,13 +336,8 @@ class ScriptGraphWindow(QMainWindow):
         def process_branch(block, counter):
             branch_nodes = []
             for line in block:
-                if not line.strip(): continue
-                nt = default_node_type
-                for nc in node_types:
-                    if re.match(nc.get("pattern", ""), line, re.IGNORECASE):
-                        nt = nc.get("name", default_node_type)
-                        break
-                branch_nodes.append(ScriptGraphNode(f"n_{counter}", nt, line))
+                if not line: continue
+                branch_nodes.append(ScriptGraphNode(f"n_{counter}", classify(line), line))
                 counter += 1
             return branch_nodes, counter
 
@@ -281,13 +356,41 @@ class ScriptGraphWindow(QMainWindow):
         return all_c_nodes, all_c_conns, t_nodes[-1] if t_nodes else condition_node, f_nodes[-1] if f_nodes else condition_node
 
 class ScriptGraphCanvas(QWidget):
+    # Colors and pens are immutable and shared by the canvases of all section tabs
+    color_bg = QColor(25, 25, 25)
+    color_grid_main = QColor(15, 15, 15)
+    color_grid_sub = QColor(35, 35, 35)
+    color_link = QColor(0, 255, 128)
+    type_colors = {
+        'start': QColor(46, 104, 46), 'end': QColor(104, 46, 46),
+        'dialogue': QColor(46, 68, 104), 'function': QColor(104, 104, 46),
+        'jump': QColor(86, 46, 104), 'wait': QColor(70, 70, 70),
+        'show': QColor(104, 76, 32), 'condition': QColor(128, 64, 128),
+        'if_show_variant': QColor(128, 64, 128)
+    }
+    _pen_link = QPen(color_link, 2.2)
+    _pen_grid_main = QPen(color_grid_main, 1.0)
+    _pen_grid_sub = QPen(color_grid_sub, 1.0)
+
     def __init__(self):
         super().__init__()
         self.nodes, self.connections = [], []
+        self._node_by_id = {}
+        self._links = []  # Connections resolved to (from node, to node) pairs, see set_data
+        # (QPainterPath, bounds) per link and (node, bounds) per node, built on paint after the
+        # nodes are placed; the bounds decide what is inside the visible scene area
+        self._link_paths = self._node_bounds = None
+        self._layout_key = None  # Nodes and sizes _arrange_horizontal last placed, see set_data
+        self._pending_data = None  # (nodes, connections) waiting for populate()
         self.zoom, self.offset = 1.0, QPointF(0, 0)
         self.last_mouse_pos, self.dragging_canvas = QPointF(), False
         self.renderer_factory = NodeRendererFactory()
-        self._load_color_config()
+        self.visible_rect = None  # Scene area of the current frame, set by paintEvent
+        self.zooming = False  # True until the wheel has rested for a moment, see wheelEvent
+        self._zoom_settle_timer = QTimer(self)
+        self._zoom_settle_timer.setSingleShot(True)
+        self._zoom_settle_timer.setInterval(150)
+        self._zoom_settle_timer.timeout.connect(self._end_zoom)
 
     def _get_resource_path(self, relative_path: str) -> str:
         if getattr(sys, 'frozen', False):
@@ -303,24 +406,31 @@ class ScriptGraphCanvas(QWidget):
             base_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
             return os.path.join(base_path, relative_path)
 
-    def _load_color_config(self):
-        self.color_bg = QColor(25, 25, 25)
-        self.color_grid_main = QColor(15, 15, 15)
-        self.color_grid_sub = QColor(35, 35, 35)
-        self.color_link = QColor(0, 255, 128)
-        self.type_colors = {
-            'start': QColor(46, 104, 46), 'end': QColor(104, 46, 46),
-            'dialogue': QColor(46, 68, 104), 'function': QColor(104, 104, 46),
-            'jump': QColor(86, 46, 104), 'wait': QColor(70, 70, 70),
-            'show': QColor(104, 76, 32), 'condition': QColor(128, 64, 128),
-            'if_show_variant': QColor(128, 64, 128)
-        }
+    def set_data_deferred(self, nodes, connections):
+        """Keep the graph and apply it with set_data on the first populate()"""
+        self._pending_data = (nodes, connections)
+
+    def populate(self):
+        if self._pending_data is not None:
+            nodes, connections = self._pending_data
+            self._pending_data = None
+            self.set_data(nodes, connections)
 
     def set_data(self, nodes, connections):
-        metrics = QFontMetrics(QFont("Consolas", 10))
-        for node in nodes: node.calculate_height(metrics)
+        self._pending_data = None
+        for node in nodes: node.calculate_height()
         self.nodes, self.connections = nodes, connections
-        self._arrange_horizontal()
+        # Ids are resolved once here instead of scanning the node list for every link on every paint
+        self._node_by_id = {n.id: n for n in nodes}
+        by_id = self._node_by_id
+        self._links = [(by_id[a], by_id[b]) for a, b in connections if a in by_id and b in by_id]
+        # The same nodes with the same sizes are already in place; the link curves are
+        # rebuilt anyway since the connections may differ
+        layout_key = (tuple(nodes), tuple((n.width, n.height) for n in nodes))
+        if layout_key != self._layout_key:
+            self._arrange_horizontal()
+            self._layout_key = layout_key
+        self._link_paths = self._node_bounds = None
         self.update()
 
     def _arrange_horizontal(self):
@@ -330,6 +440,7 @@ class ScriptGraphCanvas(QWidget):
             node.x = x
             node.y = y - (node.height / 2.0)
             x += node.width + spacing
+        self._link_paths = self._node_bounds = None
 
     def get_transform(self):
         t = QTransform()
@@ -341,6 +452,13 @@ class ScriptGraphCanvas(QWidget):
     def wheelEvent(self, event):
         delta = event.angleDelta().y()
         self.zoom = max(0.1, min(3.0, self.zoom * (1.1 if delta > 0 else 0.9)))
+        # Renderers skip building caches for a zoom level that is still changing
+        self.zooming = True
+        self._zoom_settle_timer.start()
+        self.update()
+
+    def _end_zoom(self):
+        self.zooming = False
         self.update()
 
     def mousePressEvent(self, event):
@@ -357,45 +475,92 @@ class ScriptGraphCanvas(QWidget):
         self.dragging_canvas = False
 
     def paintEvent(self, event):
+        self.populate()
         painter = QPainter(self)
         painter.setRenderHint(QPainter.Antialiasing)
         transform = self.get_transform()
+        # Scene area shown in this frame; links and nodes outside it are skipped
+        inv_t, _ = transform.inverted()
+        visible = self.visible_rect = inv_t.mapRect(QRectF(self.rect()))
         self._draw_grid(painter, transform)
         painter.setTransform(transform)
-        for from_id, to_id in self.connections: self._draw_link(painter, from_id, to_id)
-        for node in self.nodes: self._draw_node(painter, node)
+        # Node positions only change on arrangement; zoom and pan are in the transform
+        if self._link_paths is None:
+            # The margins cover the link pen (straight links have flat control point rects)
+            # and the ports and labels that stick out past the node edges
+            self._link_paths = [(path, path.controlPointRect().adjusted(-2, -2, 2, 2))
+                                for path in self._build_link_paths()]
+            self._node_bounds = [(node, node.get_rect().adjusted(-10, -10, 10, 10)) for node in self.nodes]
+        painter.setPen(self._pen_link)
+        for path, bounds in self._link_paths:
+            if visible.intersects(bounds): painter.drawPath(path)
+        for node, bounds in self._node_bounds:
+            if visible.intersects(bounds): self._draw_node(painter, node)
 
     def _draw_grid(self, painter, transform):
         painter.fillRect(self.rect(), self.color_bg)
-        inv_t, _ = transform.inverted()
-        visible = inv_t.mapRect(QRectF(self.rect()))
+        visible = self.visible_rect
         step = 25.0
+        if step * self.zoom < 4.0:
+            # Sub lines would be packed closer than 4 px: draw only the main lines (every 125),
+            # thinned out further if even those would come closer than 2 px
+            step = 125.0 * math.ceil(2.0 / (125.0 * self.zoom))
         painter.setTransform(transform)
-        for x in range(int(visible.left() // step * step), int(visible.right() + step), int(step)):
-            painter.setPen(QPen(self.color_grid_main if x % 125 == 0 else self.color_grid_sub, 1.0))
-            painter.drawLine(QPointF(x, visible.top()), QPointF(x, visible.bottom()))
-        for y in range(int(visible.top() // step * step), int(visible.bottom() + step), int(step)):
-            painter.setPen(QPen(self.color_grid_main if y % 125 == 0 else self.color_grid_sub, 1.0))
-            painter.drawLine(QPointF(visible.left(), y), QPointF(visible.right(), y))
-
-    def _draw_link(self, painter, from_id, to_id):
-        n1 = next((n for n in self.nodes if n.id == from_id), None)
-        n2 = next((n for n in self.nodes if n.id == to_id), None)
-        if n1 and n2:
-            p1, p2 = n1.exit_port, n2.enter_port
+        # Lines are batched per color so each direction takes two pen changes and two draw calls;
+        # verticals still go first, so crossings look as before
+        main_pen, sub_pen = self._pen_grid_main, self._pen_grid_sub
+        top, bottom, left, right = visible.top(), visible.bottom(), visible.left(), visible.right()
+        main_lines, sub_lines = [], []
+        for x in range(int(left // step * step), int(right + step), int(step)):
+            (main_lines if x % 125 == 0 else sub_lines).append(QLineF(x, top, x, bottom))
+        painter.setPen(sub_pen); painter.drawLines(sub_lines)
+        painter.setPen(main_pen); painter.drawLines(main_lines)
+        main_lines, sub_lines = [], []
+        for y in range(int(top // step * step), int(bottom + step), int(step)):
+            (main_lines if y % 125 == 0 else sub_lines).append(QLineF(left, y, right, y))
+        painter.setPen(sub_pen); painter.drawLines(sub_lines)
+        painter.setPen(main_pen); painter.drawLines(main_lines)
+
+    def _build_link_paths(self):
+        """Return the cubic QPainterPath of every link, in self._links order"""
+        links = self._links
+        if np is None or len(links) < _LINK_ARRAY_MIN_LINKS:
+            return [self._link_path(n1, n2) for n1, n2 in links]
+        # Same control points as _link_path, computed for all links at once from the port coordinates
+        x1, y1, x2, y2 = np.array([(n1.x + n1.width, n1.y + n1.height / 2.0, n2.x, n2.y + n2.height / 2.0)
+                                   for n1, n2 in links], dtype=np.float64).T
+        vertical = np.abs(y1 - y2) > np.abs(x1 - x2)
+        half = (y2 - y1) / 2
+        dist = np.maximum(np.abs(x2 - x1) * 0.5, 50.0)
+        rows = np.column_stack((
+            x1, y1,
+            np.where(vertical, x1, x1 + dist), np.where(vertical, y1 + half, y1),
+            np.where(vertical, x2, x2 - dist), np.where(vertical, y2 - half, y2),
+            x2, y2,
+        )).tolist()
+        paths = []
+        for px1, py1, c1x, c1y, c2x, c2y, px2, py2 in rows:
             path = QPainterPath()
-            path.moveTo(p1)
-            if abs(p1.y() - p2.y()) > abs(p1.x() - p2.x()):
-                cp1 = QPointF(p1.x(), p1.y() + (p2.y() - p1.y())/2)
-                cp2 = QPointF(p2.x(), p2.y() - (p2.y() - p1.y())/2)
-            else:
-                dist = max(abs(p2.x() - p1.x()) * 0.5, 50.0)
-                cp1 = QPointF(p1.x() + dist, p1.y())
-                cp2 = QPointF(p2.x() - dist, p2.y())
-            path.cubicTo(cp1, cp2, p2)
-            painter.setPen(QPen(self.color_link, 2.2))
-            painter.drawPath(path)
+            path.moveTo(px1, py1)
+            path.cubicTo(c1x, c1y, c2x, c2y, px2, py2)
+            paths.append(path)
+        return paths
+
+    @staticmethod
+    def _link_path(n1, n2):
+        p1, p2 = n1.exit_port, n2.enter_port
+        path = QPainterPath()
+        path.moveTo(p1)
+        if abs(p1.y() - p2.y()) > abs(p1.x() - p2.x()):
+            cp1 = QPointF(p1.x(), p1.y() + (p2.y() - p1.y())/2)
+            cp2 = QPointF(p2.x(), p2.y() - (p2.y() - p1.y())/2)
+        else:
+            dist = max(abs(p2.x() - p1.x()) * 0.5, 50.0)
+            cp1 = QPointF(p1.x() + dist, p1.y())
+            cp2 = QPointF(p2.x() - dist, p2.y())
+        path.cubicTo(cp1, cp2, p2)
+        return path
 
     def _draw_node(self, painter, node):
-        renderer = self.renderer_factory.get_renderer(node.type, node.content)
+        renderer = self.renderer_factory.renderer_for(node)
         renderer.draw_node(painter, node, self)
\ No newline at end of file
@@ -3,9 +3,68 @@ Renderer for standard nodes that appear horizontally in the graph.
 This handles the basic node rendering with header, body, and ports.
 """
 
+import math
+from collections import OrderedDict
 from PyQt5.QtWidgets import QWidget
 from PyQt5.QtCore import Qt, QPointF, QRectF
-from PyQt5.QtGui import QPainter, QColor, QFont, QPen
+from PyQt5.QtGui import QPainter, QColor, QFont, QPen, QPixmap, QTransform
+from .paint_cache import SCRATCH_RECT
+
+
+# Paint resources shared by every standard node, built once instead of per draw
+_HEADER_FONT = QFont("Segoe UI", 9, QFont.Bold)
+_CONTENT_FONT = QFont("Consolas", 10)
+_BODY_PEN = QPen(QColor(10, 10, 10), 1.5)
+_PORT_PEN = QPen(QColor(0, 0, 0, 100), 1.0)
+_WHITE = QColor(255, 255, 255)
+_DEFAULT_COLOR = QColor(60, 60, 60)
+_BODY_COLORS = {}  # base color rgba -> its darker(220) body color
+_PIXMAP_MARGIN = 1.0  # Room around the node in its cached pixmap for the outer half of the body pen
+_MAX_CACHED_ZOOM = 1.0  # Above this few nodes fit on screen and their pixmaps get large, so they are drawn directly
+_SUBPIXEL_STEPS = 64  # Fractional device positions are rounded to 1/64 px in the pixmap key
+
+
+class _PixmapLRU:
+    """Pixmaps by key, dropping the least recently used once they exceed a byte budget"""
+
+    __slots__ = ('_pixmaps', '_limit', '_bytes')
+
+    def __init__(self, limit_bytes):
+        self._pixmaps = OrderedDict()  # key -> (pixmap, its size in bytes)
+        self._limit = limit_bytes
+        self._bytes = 0
+
+    def find(self, key):
+        entry = self._pixmaps.get(key)
+        if entry is None:
+            return None
+        self._pixmaps.move_to_end(key)
+        return entry[0]
+
+    def insert(self, key, pixmap):
+        size = pixmap.width() * pixmap.height() * pixmap.depth() // 8
+        old = self._pixmaps.pop(key, None)
+        if old is not None:
+            self._bytes -= old[1]
+        self._pixmaps[key] = (pixmap, size)
+        self._bytes += size
+        while self._bytes > self._limit and len(self._pixmaps) > 1:
+            self._bytes -= self._pixmaps.popitem(last=False)[1][1]
+
+    def clear(self):
+        self._pixmaps.clear()
+        self._bytes = 0
+
+
+# Node body pixmaps, kept apart from the process-wide QPixmapCache that Qt styles also use
+_PIXMAP_CACHE = _PixmapLRU(32 * 1024 * 1024)
+
+
+def _body_color(base_color):
+    body_color = _BODY_COLORS.get(base_color.rgba())
+    if body_color is None:
+        body_color = _BODY_COLORS[base_color.rgba()] = base_color.darker(220)
+    return body_color
 
 
 class StandardNodeRenderer:
@@ -13,6 +72,8 @@ class StandardNodeRenderer:
     Renderer for standard nodes that appear horizontally in the graph.
     This handles the basic node rendering with header, body, and ports.
     """
+
+    __slots__ = ()  # Stateless; one shared instance lives in NodeRendererFactory
     
     def draw_node(self, painter: QPainter, node, canvas):
         """
@@ -23,35 +84,86 @@ class StandardNodeRenderer:
             node: The node object to draw
             canvas: The canvas that contains the node
         """
-        # Get the base color based on node type
-        base_color = canvas.type_colors.get(node.type, QColor(60, 60, 60))
-        body_color = base_color.darker(220)
+        rect = node.get_rect()
+        base_color = canvas.type_colors.get(node.type, _DEFAULT_COLOR)
+        # The body, header and content never change after layout, so they are drawn from a cached
+        # pixmap. It is rendered with the painter's own transform moved by whole device pixels, so it
+        # keeps the exact zoom and sub-pixel offset, and is drawn 1:1 at that whole pixel. The key
+        # covers everything the pixmap shows, so nodes that look the same share one and edits need
+        # no invalidation
+        transform = painter.transform()
+        pixmap = None
+        if transform.m11() <= _MAX_CACHED_ZOOM:
+            dpr = painter.device().devicePixelRatioF()
+            scale = transform.m11() * dpr
+            origin = transform.map(QPointF(node.x - _PIXMAP_MARGIN, node.y - _PIXMAP_MARGIN)) * dpr
+            # Panning moves nodes by whole device pixels, so the rounded fractions stay the same
+            ix, fx = divmod(round(origin.x() * _SUBPIXEL_STEPS), _SUBPIXEL_STEPS)
+            iy, fy = divmod(round(origin.y() * _SUBPIXEL_STEPS), _SUBPIXEL_STEPS)
+            key = (scale, fx, fy, node.width, node.height, node.hdr_h, base_color.rgba(), node.type, node.content)
+            pixmap = _PIXMAP_CACHE.find(key)
+            # While the wheel is turning, nodes are drawn directly instead of being rendered for a
+            # zoom that is about to change again
+            if pixmap is None and not getattr(canvas, 'zooming', False):
+                device = transform * QTransform(dpr, 0, 0, dpr, -ix, -iy)
+                pixmap = self._render_body(painter, node, rect, base_color, device, dpr)
+                _PIXMAP_CACHE.insert(key, pixmap)
+        if pixmap is None:
+            self._draw_body(painter, node, rect, base_color)
+        else:
+            world = painter.worldTransform()
+            painter.resetTransform()
+            painter.drawPixmap(QPointF(ix / dpr, iy / dpr), pixmap)
+            painter.setWorldTransform(world)
+
+        # Draw the connection ports
+        painter.setBrush(canvas.color_link)
+        painter.setPen(_PORT_PEN)
+        painter.drawEllipse(node.enter_port, 5.0, 5.0)
+        painter.drawEllipse(node.exit_port, 5.0, 5.0)
+
+    @classmethod
+    def _render_body(cls, painter, node, rect, base_color, device, dpr):
+        """Render _draw_body into a new pixmap through device, the transform to pixmap pixels"""
+        bounds = device.mapRect(rect.adjusted(-_PIXMAP_MARGIN, -_PIXMAP_MARGIN, _PIXMAP_MARGIN, _PIXMAP_MARGIN))
+        pixmap = QPixmap(math.ceil(bounds.right()) + 1, math.ceil(bounds.bottom()) + 1)
+        pixmap.fill(Qt.transparent)
+        cache_painter = QPainter(pixmap)
+        cache_painter.setRenderHints(painter.renderHints())
+        cache_painter.setTransform(device)
+        cls._draw_body(cache_painter, node, rect, base_color)
+        cache_painter.end()
+        # Set after painting, so the pixels map 1:1 to the device instead of scaling the painter
+        pixmap.setDevicePixelRatio(dpr)
+        return pixmap
+
+    @staticmethod
+    def _draw_body(painter, node, rect, base_color):
+        """Draw the body, header and content of node, everything but the ports"""
+        body_color = _body_color(base_color)
 
         # Draw the node body with rounded corners
-        painter.setPen(QPen(QColor(10, 10, 10), 1.5))
+        painter.setPen(_BODY_PEN)
         painter.setBrush(body_color)
-        painter.drawRoundedRect(node.get_rect(), 8.0, 8.0)
+        painter.drawRoundedRect(rect, 8.0, 8.0)
 
         # Draw the header
-        hdr_rect = QRectF(node.x, node.y, node.width, node.hdr_h)
+        SCRATCH_RECT.setRect(node.x, node.y, node.width, node.hdr_h)
         painter.setPen(Qt.NoPen)
         painter.setBrush(base_color)
-        painter.drawRoundedRect(hdr_rect, 8.0, 8.0)
-        painter.drawRect(QRectF(node.x, node.y + node.hdr_h - 5.0, node.width, 5.0))
+        painter.drawRoundedRect(SCRATCH_RECT, 8.0, 8.0)
+        SCRATCH_RECT.setRect(node.x, node.y + node.hdr_h - 5.0, node.width, 5.0)
+        painter.drawRect(SCRATCH_RECT)
 
         # Draw the node type in the header
-        painter.setPen(QColor(255, 255, 255))
-        painter.setFont(QFont("Segoe UI", 9, QFont.Bold))
-        painter.drawText(hdr_rect.adjusted(12, 0, -12, 0), Qt.AlignVCenter, node.type.upper())
+        painter.setPen(_WHITE)
+        painter.setFont(_HEADER_FONT)
+        SCRATCH_RECT.setRect(node.x + 12, node.y, node.width - 24, node.hdr_h)
+        painter.drawText(SCRATCH_RECT, Qt.AlignVCenter, node.type.upper())
 
         # Draw the node content
-        painter.setFont(QFont("Consolas", 10))
+        painter.setFont(_CONTENT_FONT)
         flags = Qt.AlignLeft | Qt.TextWordWrap | Qt.TextWrapAnywhere
-        content_rect = node.get_rect().adjusted(15, node.hdr_h + 12, -15, -12)
-        painter.drawText(content_rect, flags, node.content)
-
-        # Draw the connection ports
-        painter.setBrush(canvas.color_link)
-        painter.setPen(QPen(QColor(0, 0, 0, 100), 1.0))
-        painter.drawEllipse(node.enter_port, 5.0, 5.0)
-        painter.drawEllipse(node.exit_port, 5.0, 5.0)
\ No newline at end of file
+        SCRATCH_RECT.setRect(node.x + 15, node.y + node.hdr_h + 12,
+                             node.width - 30, node.height - node.hdr_h - 24)
+        painter.drawText(SCRATCH_RECT, flags, node.content)
\ No newline at end of file